@@ -1,14 +1,15 @@
-import sys, os
+import sys, os, asyncio
 
 sys.path.append(os.getcwd())
 
 from agno.models.openai import OpenAILike
 from agno.models.deepseek import DeepSeek
-from agent_system import AgentSystem
-from prompt_toolkit import prompt, print_formatted_text
+from agent_system import AgentSystem, AgentEvent
+from utils.graph_repository import SnapshotGraphRepository
+from prompt_toolkit import PromptSession, print_formatted_text
 
 
-if __name__ == "__main__":
+def build_agent_system() -> AgentSystem:
     base_url = os.getenv("EMBED_BASE_URL")
     glm_4_7_model = OpenAILike(
         api_key=os.getenv("CHATGLM_API_KEY"),
@@ -26,16 +27,66 @@ if __name__ == "__main__":
         id="deepseek-reasoner",
     )
 
+    # 只读副本：设置快照路径后所有图查询在进程内完成，不访问 Neo4j
+    snapshot_path = os.getenv("GRAPH_SNAPSHOT_PATH")
+    repository = SnapshotGraphRepository(snapshot_path) if snapshot_path else None
+
+    # 连接参数只在直接访问 Neo4j 时需要
+    neo4j_kwargs = (
+        {}
+        if repository is not None
+        else dict(
+            uri=os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+            user=os.getenv("NEO4J_USERNAME", "neo4j"),
+            password=os.getenv("NEO4J_PASSWORD", "12345678"),
+            database=os.getenv("NEO4J_DATABASE", "service-cim-2026-01-10"),
+        )
+    )
     agent_system = AgentSystem(
-        uri="bolt://localhost:7687",
-        user="neo4j",
-        password="12345678",
-        database="service-cim-2026-01-10",
         search_model=glm_4_7_model,
         summarize_model=deepseek_chat_model,
         embedding_base_url=base_url,
+        repository=repository,
+        # HYBRID_SEARCH=1 时业务实体检索融合 BM25 词法结果，名称或接口编码完全匹配时不请求向量服务
+        hybrid_search=os.getenv("HYBRID_SEARCH", "0") == "1",
+        **neo4j_kwargs,
     )
+    return agent_system
+
+
+def render_event(event: AgentEvent):
+    if event.type == "exact_match":
+        names = ", ".join(i["name"] for i in event.data["interfaces"])
+        print_formatted_text(f"[exact match] {names}")
+    elif event.type == "prefetch":
+        names = ", ".join(i["name"] for i in event.data["interfaces"])
+        print_formatted_text(f"[prefetch] {names or '-'}")
+    elif event.type == "step_started":
+        print_formatted_text(f"[step {event.data['step']}] searching...")
+    elif event.type == "tool_call":
+        print_formatted_text(f"  -> {event.data['tool']}({event.data['args']})")
+    elif event.type == "interfaces_found":
+        names = ", ".join(i["name"] for i in event.data["interfaces"])
+        print_formatted_text(f"  interfaces: {names or '-'}")
+    elif event.type == "step_finished" and event.data["stopped"]:
+        print_formatted_text(f"  stop: {event.data['reason']}\n")
+    elif event.type == "summary_token":
+        print_formatted_text(event.data["content"], end="", flush=True)
+    elif event.type == "answer":
+        if event.data["cached"]:
+            print_formatted_text(event.data["content"])
+        print_formatted_text("")
+
+
+async def main():
+    # 使用 aresponse：同一轮的多个工具调用并发执行，向量请求合并为一次
+    agent_system = build_agent_system()
+    session = PromptSession()
     while True:
-        question = prompt("User: ")
-        anwser = agent_system.response(question=question)
-        print_formatted_text(anwser)
+        question = await session.prompt_async("User: ")
+        async for event in agent_system.astream_response(question=question):
+            render_event(event)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
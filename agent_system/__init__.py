@@ -1,5 +1,25 @@
 from .agent_system import AgentSystem
+from .convergence import (
+    ConvergencePolicy,
+    AllSeenPolicy,
+    JaccardStabilityPolicy,
+    NoNewEntitiesPolicy,
+    BudgetPolicy,
+    AnyPolicy,
+    StepRecord,
+)
+from .answer_cache import SemanticAnswerCache
+from .events import AgentEvent
 
 __all__ = [
     "AgentSystem",
+    "ConvergencePolicy",
+    "AllSeenPolicy",
+    "JaccardStabilityPolicy",
+    "NoNewEntitiesPolicy",
+    "BudgetPolicy",
+    "AnyPolicy",
+    "StepRecord",
+    "SemanticAnswerCache",
+    "AgentEvent",
 ]
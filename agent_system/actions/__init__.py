@@ -1,6 +1,8 @@
 from .interface_action import InterfaceAction
+from .interface_matcher import InterfaceMatcher
 
 
 __all__ = [
     "InterfaceAction",
+    "InterfaceMatcher",
 ]
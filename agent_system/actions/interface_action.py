@@ -2,61 +2,145 @@ import sys, os
 
 sys.path.append(os.getcwd())
 
-from typing import List
-from neo4j import GraphDatabase
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from agent_system.world_state import WorldState
 from utils.utils import flatten
+from utils.graph_repository import GraphRepository, Neo4jGraphRepository
 from loguru import logger
 
 
 class InterfaceAction:
     def __init__(
         self,
-        uri: str,
-        user: str,
-        password: str,
-        database: str,
+        uri: Optional[str] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        database: Optional[str] = None,
+        cache_size: int = 1024,
+        cache_check_interval: float = 30.0,
+        repository: Optional[GraphRepository] = None,
     ) -> None:
         super().__init__()
-        self.database = database
-        try:
-            self.driver = GraphDatabase.driver(uri, auth=(user, password))
-            self.driver.verify_connectivity()
-            logger.debug("Connected to Neo4j database")
-        except Exception as e:
-            logger.error(f"Failed to connect to Neo4j: {e}")
-            raise
+        # 连接参数只在没有传入 repository 时使用
+        self.repository = repository or Neo4jGraphRepository(
+            uri=uri, user=user, password=password, database=database
+        )
+
+        # interface id -> interface info, 数据库有写入时整体失效
+        self.cache_size = cache_size
+        self.cache_check_interval = cache_check_interval
+        self._cache: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_version: Optional[int] = self.repository.version()
+        self._cache_checked_at = time.monotonic()
         return
 
     def get_interface_by_interface_id(self, interface_id: str):
-        with self.driver.session(database=self.database) as session:
-            record = session.run(
-                """
-                MATCH (i:Interface {id: $interface_id})
-                RETURN i.id AS id, i.name AS name, i.llm_description AS llm_description
-                """,
-                interface_id=interface_id,
-            ).single()
-            if record is None:
-                return None
-            return {
-                "id": record["id"],
-                "name": record["name"],
-                "llm_description": record["llm_description"],
-            }
+        return self.get_interfaces_by_interface_ids([interface_id]).get(interface_id)
+
+    def get_interfaces_by_interface_ids(
+        self, interface_ids: List[str]
+    ) -> Dict[str, Dict[str, str]]:
+        self._check_cache_version()
+        interfaces, missing_ids = self._lookup_cache(interface_ids)
+        if not missing_ids:
+            return interfaces
+
+        records = self.repository.get_interfaces(missing_ids)
+        interfaces.update(self._store_cache(records))
+        return interfaces
+
+    async def aget_interfaces_by_interface_ids(
+        self, interface_ids: List[str]
+    ) -> Dict[str, Dict[str, str]]:
+        await asyncio.to_thread(self._check_cache_version)
+        interfaces, missing_ids = self._lookup_cache(interface_ids)
+        if not missing_ids:
+            return interfaces
+
+        records = await self.repository.aget_interfaces(missing_ids)
+        interfaces.update(self._store_cache(records))
+        return interfaces
+
+    def _lookup_cache(
+        self, interface_ids: List[str]
+    ) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+        interfaces = {}
+        missing_ids = []
+        with self._cache_lock:
+            for interface_id in dict.fromkeys(interface_ids):
+                if interface_id in self._cache:
+                    self._cache.move_to_end(interface_id)
+                    interfaces[interface_id] = self._cache[interface_id]
+                else:
+                    missing_ids.append(interface_id)
+        return interfaces, missing_ids
+
+    def _store_cache(self, records: List[dict]) -> Dict[str, Dict[str, str]]:
+        interfaces = {}
+        with self._cache_lock:
+            for record in records:
+                interface_info = {
+                    "id": record["id"],
+                    "name": record["name"],
+                    "llm_description": record["llm_description"],
+                    "llm_function_description": record["llm_function_description"],
+                }
+                interfaces[record["id"]] = interface_info
+                self._cache[record["id"]] = interface_info
+                self._cache.move_to_end(record["id"])
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return interfaces
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _check_cache_version(self) -> None:
+        now = time.monotonic()
+        if now - self._cache_checked_at < self.cache_check_interval:
+            return
+        self._cache_checked_at = now
+
+        version = self.repository.version()
+        if version is None or version == self._cache_version:
+            return
+        logger.debug(
+            f"Graph changed ({self._cache_version} -> {version}), clear interface cache"
+        )
+        self._cache_version = version
+        self.clear_cache()
 
     def update_by_interface_ids(
         self, state: WorldState, interface_ids: List[str]
     ) -> WorldState:
         interface_ids = list(flatten(interface_ids))
+        interface_infos = self.get_interfaces_by_interface_ids(interface_ids)
+        return self._update_state(state, interface_ids, interface_infos)
+
+    async def aupdate_by_interface_ids(
+        self, state: WorldState, interface_ids: List[str]
+    ) -> WorldState:
+        interface_ids = list(flatten(interface_ids))
+        interface_infos = await self.aget_interfaces_by_interface_ids(interface_ids)
+        return self._update_state(state, interface_ids, interface_infos)
 
+    @staticmethod
+    def _update_state(
+        state: WorldState,
+        interface_ids: List[str],
+        interface_infos: Dict[str, Dict[str, str]],
+    ) -> WorldState:
         interface_calls = []
         new_obtained_entities: List[str] = state.obtained_entities
         new_required_entities: List[str] = []
         for interface_id in interface_ids:
-            interface_info = self.get_interface_by_interface_id(
-                interface_id=interface_id
-            )
+            interface_info = interface_infos.get(interface_id)
             if not interface_info:
                 continue
 
@@ -65,6 +149,7 @@ class InterfaceAction:
                     "id": interface_info["id"],
                     "name": interface_info["name"],
                     "description": interface_info["llm_description"],
+                    "function_description": interface_info["llm_function_description"],
                 }
             )
 
@@ -0,0 +1,97 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import time
+import threading
+from typing import List, Optional
+from utils.aho_corasick import AhoCorasick, longest_matches
+from utils.graph_repository import INTERFACE_KEY_FIELDS, GraphRepository
+from utils.lexical_index import normalize_key
+from utils.tracing import span
+from loguru import logger
+
+
+def _is_ascii_alnum(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class InterfaceMatcher:
+    """
+    在问题中查找接口的 code / name / standard_name / production_url。
+    启动时对所有 Interface 构建 Aho-Corasick 自动机，数据版本变化时重建。
+    """
+
+    def __init__(
+        self,
+        repository: GraphRepository,
+        min_length: int = 4,
+        check_interval: float = 30.0,
+    ) -> None:
+        self.repository = repository
+        # 过短的名称容易误匹配
+        self.min_length = min_length
+        self.check_interval = check_interval
+
+        self._automaton: Optional[AhoCorasick[str]] = None
+        self._version: Optional[int] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def _refresh(self) -> AhoCorasick[str]:
+        now = time.monotonic()
+        if self._automaton is not None and now - self._checked_at < self.check_interval:
+            return self._automaton
+        with self._lock:
+            if self._automaton is not None and now - self._checked_at < self.check_interval:
+                return self._automaton
+            self._checked_at = now
+            version = self.repository.version()
+            if self._automaton is None or version != self._version:
+                self._automaton = self._build()
+                self._version = version
+        return self._automaton
+
+    def _build(self) -> AhoCorasick[str]:
+        automaton: AhoCorasick[str] = AhoCorasick()
+        patterns = 0
+        for interface in self.repository.list_interfaces():
+            keys = {
+                normalize_key(interface.get(field) or "")
+                for field in INTERFACE_KEY_FIELDS
+            }
+            for key in keys:
+                if len(key) >= self.min_length:
+                    automaton.add(key, interface["id"])
+                    patterns += 1
+        logger.debug(f"Built interface matcher with {patterns} patterns")
+        return automaton.build()
+
+    def match(self, question: str) -> List[str]:
+        """返回问题中出现的接口 id，按出现位置排序。"""
+        automaton = self._refresh()
+        text = normalize_key(question)
+        with span("interface_matcher.match", question_chars=len(text)) as s:
+            matches = [
+                (start, end, interface_id)
+                for start, end, interface_id in automaton.find_all(text)
+                if not InterfaceMatcher._inside_word(text, start, end)
+            ]
+            interface_ids = list(
+                dict.fromkeys(
+                    interface_id
+                    for _, _, interface_id in sorted(longest_matches(matches))
+                )
+            )
+            s.set_attribute("matches", len(interface_ids))
+        return interface_ids
+
+    @staticmethod
+    def _inside_word(text: str, start: int, end: int) -> bool:
+        # 以字母数字开头/结尾的模式（接口编码、URL）不能是更长单词的一部分
+        before = text[start - 1] if start > 0 else ""
+        after = text[end] if end < len(text) else ""
+        return (
+            _is_ascii_alnum(text[start]) and _is_ascii_alnum(before)
+        ) or (_is_ascii_alnum(text[end - 1]) and _is_ascii_alnum(after))
@@ -2,15 +2,38 @@ import sys, os
 
 sys.path.append(os.getcwd())
 
-from typing import List
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from pydantic import BaseModel, Field
 from agno.models.base import Model
 from agno.agent import Agent, RunOutput
+from agno.run.agent import RunContentEvent
 from agno.utils.pprint import pprint_run_response
 
 from tools.service import ServiceTools
+from utils.utils import flatten
+from utils.graph_repository import GraphRepository, Neo4jGraphRepository
+from loguru import logger
 from .world_state import WorldState
-from .actions import InterfaceAction
+from .convergence import ConvergencePolicy, StepRecord, default_policy
+from .answer_cache import AnswerCacheEntry, SemanticAnswerCache
+from .events import AgentEvent, exact_match_events, step_events
+from utils.tracing import aiter_span, iter_span, span
+from .actions import InterfaceAction, InterfaceMatcher
 
 
 class SearchResult(BaseModel):
@@ -23,90 +46,557 @@ class SearchResult(BaseModel):
     )
 
 
+class _Call(NamedTuple):
+    # _search_steps 请求执行的操作：match_interfaces / update_by_interface_ids / prefetch_hits / run_searcher
+    name: str
+    kwargs: Dict[str, Any]
+
+
 class AgentSystem:
     def __init__(
         self,
-        uri: str,
-        user: str,
-        password: str,
-        database: str,
+        uri: Optional[str] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        database: Optional[str] = None,
+        *,
         search_model: Model,
         summarize_model: Model,
         embedding_base_url: str,
+        use_local_vector_index: bool = False,
+        state_token_budget: Optional[int] = 4000,
+        convergence_policy: Optional[ConvergencePolicy] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        repository: Optional[GraphRepository] = None,
+        exact_match: bool = True,
+        prefetch: bool = True,
+        prefetch_cim_classes: bool = True,
+        hybrid_search: bool = False,
     ) -> None:
-        self.interface_action = InterfaceAction(
-            uri=uri, user=user, password=password, database=database
-        )
-        self.searcher = AgentSystem.init_searcher(
-            model=search_model,
-            uri=uri,
-            user=user,
-            password=password,
-            database=database,
+        # 搜索阶段 WorldState 的紧凑渲染预算，None 表示输出完整的缩进 JSON
+        self.state_token_budget = state_token_budget
+        self.convergence_policy = convergence_policy or default_policy()
+        # 所有图查询共用一个 repository，默认直接访问 Neo4j；传入 repository 时不需要连接参数
+        if repository is None:
+            if user is None or password is None:
+                raise ValueError("Username or password for Neo4j not provided")
+            repository = Neo4jGraphRepository(
+                uri=uri,
+                user=user,
+                password=password,
+                database=database,
+                use_local_vector_index=use_local_vector_index,
+            )
+        self.repository = repository
+        self.interface_action = InterfaceAction(repository=self.repository)
+        # 问题中直接写了接口编码、名称或地址时，不经过搜索 Agent 就能确定候选接口
+        self.interface_matcher = (
+            InterfaceMatcher(repository=self.repository) if exact_match else None
+        )
+        # 第一步之前直接用原始问题检索业务实体和 CIM 类，作为初始候选
+        self.prefetch = prefetch
+        # summarizer 之前一次性检索所有 required_entities 的 CIM 类
+        self.prefetch_cim_classes = prefetch_cim_classes
+        self._prefetch_executor = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="prefetch"
+        )
+        self.search_model = search_model
+        self.summarize_model = summarize_model
+        # searcher / summarizer Agent 在运行中保存会话和 run 状态，不能被并发请求共用，
+        # 每个问题用 _new_agents 创建一组新的 Agent
+        # 业务实体检索（工具和预检索）同时使用 BM25 词法索引，见 ServiceTools
+        self._agent_kwargs = dict(
             embedding_base_url=embedding_base_url,
+            repository=self.repository,
+            hybrid_search=hybrid_search,
         )
-        self.summarizer = AgentSystem.init_summarizer(
-            model=summarize_model,
-            uri=uri,
-            user=user,
-            password=password,
-            database=database,
+        # 问题向量化和预检索使用的工具，不保存请求状态，可以共用
+        self.service_tools = ServiceTools(
             embedding_base_url=embedding_base_url,
+            embedding_model="nvidia-llama-embed-nemotron-8b",
+            repository=self.repository,
+            hybrid_search=hybrid_search,
         )
+        self.answer_cache = answer_cache
+        if answer_cache is not None and answer_cache.get_database_version is None:
+            answer_cache.get_database_version = self.repository.version
         return
 
     def response(self, question: str, max_step: int = 10) -> str:
-        world_state = WorldState(
-            origin_question=question,
+        answer = None
+        for event in self.stream_response(question=question, max_step=max_step):
+            if event.type == "answer":
+                answer = event.data["content"]
+        return answer
+
+    async def aresponse(
+        self, question: str, max_step: int = 10, debug_mode: bool = False
+    ) -> str:
+        answer = None
+        async for event in self.astream_response(
+            question=question, max_step=max_step, debug_mode=debug_mode
+        ):
+            if event.type == "answer":
+                answer = event.data["content"]
+        return answer
+
+    def stream_response(
+        self, question: str, max_step: int = 10
+    ) -> Iterator[AgentEvent]:
+        """
+        逐步产出搜索过程事件和 summarizer 的输出片段，最后产出 answer 事件。
+        """
+        # question span 只在生成下一个事件时生效，不延续到调用方处理事件的代码中
+        return iter_span(
+            "question",
+            self._stream_response(question=question, max_step=max_step),
+            question_chars=len(question),
+            max_step=max_step,
         )
 
-        step_num = 0
-        interface_id_history = set()
-        while step_num < max_step:
-            response: RunOutput = self.searcher.run(
-                input=str(world_state),
+    def astream_response(
+        self, question: str, max_step: int = 10, debug_mode: bool = False
+    ) -> AsyncIterator[AgentEvent]:
+        return aiter_span(
+            "question",
+            self._astream_response(
+                question=question, max_step=max_step, debug_mode=debug_mode
+            ),
+            question_chars=len(question),
+            max_step=max_step,
+        )
+
+    def _stream_response(
+        self, question: str, max_step: int
+    ) -> Iterator[AgentEvent]:
+        question_embedding, cached = self._lookup_answer_cache(question)
+        if cached is not None and self.answer_cache.mode == "answer":
+            yield AgentEvent(
+                type="answer", data={"content": cached.answer, "cached": True}
+            )
+            return
+        searcher, summarizer = self._new_agents()
+        if cached is not None:
+            # 缓存的 WorldState 属于之前的问题，summarizer 应回答当前的问题
+            world_state = cached.world_state.with_question(question)
+        else:
+            for event in self._search(
+                question=question, max_step=max_step, searcher=searcher
+            ):
+                if event.type == "search_finished":
+                    world_state = event.state
+                yield event
+
+        if self.prefetch_cim_classes:
+            world_state = self._prefetch_required_cim_classes(world_state)
+
+        chunks = []
+        summarizer_input = str(world_state)
+        with span("agent.summarize", input_chars=len(summarizer_input)) as s:
+            for chunk in summarizer.run(
+                input=summarizer_input,
+                stream=True,
                 debug_mode=True,
+            ):
+                if isinstance(chunk, RunContentEvent) and chunk.content:
+                    chunks.append(chunk.content)
+                    yield AgentEvent(
+                        type="summary_token", data={"content": chunk.content}
+                    )
+            answer = "".join(chunks)
+            s.set_attribute("output_chars", len(answer))
+
+        if self.answer_cache is not None and cached is None:
+            self.answer_cache.store(
+                question=question,
+                embedding=question_embedding,
+                answer=answer,
+                world_state=world_state,
             )
-            pprint_run_response(response, markdown=True)
-            search_result: SearchResult = response.content
-            interface_ids = search_result.interface_ids
-            requied_entities = search_result.requied_entities
+        yield AgentEvent(type="answer", data={"content": answer, "cached": False})
 
-            world_state = self.interface_action.update_by_interface_ids(
-                state=WorldState(
-                    origin_question=question, required_entities=requied_entities
-                ),
-                interface_ids=interface_ids,
+    async def _astream_response(
+        self, question: str, max_step: int, debug_mode: bool
+    ) -> AsyncIterator[AgentEvent]:
+        question_embedding, cached = await asyncio.to_thread(
+            self._lookup_answer_cache, question
+        )
+        if cached is not None and self.answer_cache.mode == "answer":
+            yield AgentEvent(
+                type="answer", data={"content": cached.answer, "cached": True}
             )
+            return
+        searcher, summarizer = self._new_agents(async_tools=True)
+        if cached is not None:
+            # 缓存的 WorldState 属于之前的问题，summarizer 应回答当前的问题
+            world_state = cached.world_state.with_question(question)
+        else:
+            async for event in self._asearch(
+                question=question,
+                max_step=max_step,
+                searcher=searcher,
+                debug_mode=debug_mode,
+            ):
+                if event.type == "search_finished":
+                    world_state = event.state
+                yield event
 
-            if (
-                interface_id_history
-                and interface_ids
-                and all(
-                    interface_id in interface_id_history
-                    for interface_id in interface_ids
-                )
+        if self.prefetch_cim_classes:
+            world_state = await self._aprefetch_required_cim_classes(world_state)
+
+        chunks = []
+        summarizer_input = str(world_state)
+        with span("agent.summarize", input_chars=len(summarizer_input)) as s:
+            async for chunk in summarizer.arun(
+                input=summarizer_input,
+                stream=True,
+                debug_mode=debug_mode,
             ):
-                break
-            interface_id_history.update(interface_ids)
+                if isinstance(chunk, RunContentEvent) and chunk.content:
+                    chunks.append(chunk.content)
+                    yield AgentEvent(
+                        type="summary_token", data={"content": chunk.content}
+                    )
+            answer = "".join(chunks)
+            s.set_attribute("output_chars", len(answer))
+
+        if self.answer_cache is not None and cached is None:
+            self.answer_cache.store(
+                question=question,
+                embedding=question_embedding,
+                answer=answer,
+                world_state=world_state,
+            )
+        yield AgentEvent(type="answer", data={"content": answer, "cached": False})
 
-            step_num += 1
+    def _lookup_answer_cache(
+        self, question: str
+    ) -> Tuple[Optional[List[float]], Optional[AnswerCacheEntry]]:
+        if self.answer_cache is None:
+            return None, None
+        question_embedding = self.service_tools.embed_queries([question])[0]
+        return question_embedding, self.answer_cache.lookup(question_embedding)
 
-        response: RunOutput = self.summarizer.run(
-            input=str(world_state),
-            debug_mode=True,
+    def _new_agents(self, async_tools: bool = False) -> Tuple[Agent, Agent]:
+        searcher = AgentSystem.init_searcher(
+            model=self.search_model, async_tools=async_tools, **self._agent_kwargs
         )
+        summarizer = AgentSystem.init_summarizer(
+            model=self.summarize_model, async_tools=async_tools, **self._agent_kwargs
+        )
+        return searcher, summarizer
+
+    def _search(
+        self, question: str, max_step: int, searcher: Agent
+    ) -> Iterator[AgentEvent]:
+        steps = self._search_steps(question=question, max_step=max_step)
+        result, error = None, None
+        while True:
+            try:
+                item = steps.throw(error) if error else steps.send(result)
+            except StopIteration:
+                return
+            result, error = None, None
+            if isinstance(item, AgentEvent):
+                yield item
+                continue
+            try:
+                result = self._call(item, searcher)
+            except Exception as e:
+                error = e
+
+    async def _asearch(
+        self, question: str, max_step: int, searcher: Agent, debug_mode: bool
+    ) -> AsyncIterator[AgentEvent]:
+        steps = self._search_steps(question=question, max_step=max_step)
+        result, error = None, None
+        while True:
+            try:
+                item = steps.throw(error) if error else steps.send(result)
+            except StopIteration:
+                return
+            result, error = None, None
+            if isinstance(item, AgentEvent):
+                yield item
+                continue
+            try:
+                result = await self._acall(item, searcher, debug_mode)
+            except Exception as e:
+                error = e
+
+    def _call(self, call: "_Call", searcher: Agent) -> Any:
+        if call.name == "match_interfaces":
+            return self._match_interfaces(**call.kwargs)
+        if call.name == "update_by_interface_ids":
+            return self.interface_action.update_by_interface_ids(**call.kwargs)
+        if call.name == "prefetch_hits":
+            return self._prefetch_hits(**call.kwargs)
+        response: RunOutput = searcher.run(**call.kwargs, debug_mode=True)
         pprint_run_response(response, markdown=True)
-        return response.content
+        return response
+
+    async def _acall(self, call: "_Call", searcher: Agent, debug_mode: bool) -> Any:
+        if call.name == "match_interfaces":
+            return await asyncio.to_thread(self._match_interfaces, **call.kwargs)
+        if call.name == "update_by_interface_ids":
+            return await self.interface_action.aupdate_by_interface_ids(**call.kwargs)
+        if call.name == "prefetch_hits":
+            return await self._aprefetch_hits(**call.kwargs)
+        return await searcher.arun(**call.kwargs, debug_mode=debug_mode)
+
+    def _search_steps(
+        self, question: str, max_step: int
+    ) -> Generator[Union[AgentEvent, "_Call"], Any, None]:
+        """
+        搜索循环本身，不做 I/O：需要查询或调用搜索 Agent 时产出 _Call，
+        由 _search / _asearch 同步或异步执行后把结果 send 回来；其余产出的是 AgentEvent。
+        """
+        world_state = WorldState(
+            origin_question=question,
+        )
+        new_interface_ids: List[str] = []
+        matched_ids = yield _Call("match_interfaces", {"question": question})
+        if matched_ids:
+            world_state = yield _Call(
+                "update_by_interface_ids",
+                {"state": world_state, "interface_ids": matched_ids},
+            )
+            events = exact_match_events(world_state)
+            yield from events
+            if events[-1].type == "search_finished":
+                return
+            new_interface_ids = matched_ids
+        if self.prefetch:
+            entity_hits, cim_class_hits = yield _Call(
+                "prefetch_hits", {"question": question}
+            )
+            world_state = yield _Call(
+                "update_by_interface_ids",
+                {
+                    "state": world_state.update(cim_classes={question: cim_class_hits}),
+                    "interface_ids": AgentSystem._hit_interface_ids(entity_hits),
+                },
+            )
+            new_interface_ids = [i["id"] for i in world_state.interface_history]
+            yield AgentSystem._prefetch_event(world_state)
+
+        started_at = time.monotonic()
+        step_records: List[StepRecord] = []
+        while len(step_records) < max_step:
+            yield AgentEvent(type="step_started", data={"step": len(step_records) + 1})
+            search_input = world_state.render(
+                token_budget=self.state_token_budget,
+                full_description_ids=new_interface_ids,
+            )
+            # span 内只产出 _Call，由驱动在同一上下文中执行，不会跨越对外的事件
+            with span(
+                "agent.search_step",
+                step=len(step_records) + 1,
+                input_chars=len(search_input),
+            ) as s:
+                response: RunOutput = yield _Call("run_searcher", {"input": search_input})
+                search_result: SearchResult = response.content
+                interface_ids = search_result.interface_ids
+                requied_entities = search_result.requied_entities
+
+                world_state = yield _Call(
+                    "update_by_interface_ids",
+                    {
+                        "state": WorldState(
+                            origin_question=question,
+                            required_entities=requied_entities,
+                            cim_classes=world_state.cim_classes,
+                        ),
+                        "interface_ids": interface_ids,
+                    },
+                )
+                AgentSystem._trace_run(s, response)
+
+            new_interface_ids = self._record_step(
+                step_records, response, search_result, started_at, max_step
+            )
+            yield from step_events(response, world_state, step_records[-1])
+            if step_records[-1].stopped:
+                break
+        yield AgentEvent(
+            type="search_finished",
+            data={"steps": len(step_records)},
+            state=world_state,
+            step_records=step_records,
+        )
+
+    def _prefetch_hits(
+        self, question: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        # 两个检索并发执行，问题向量经 batcher 只请求一次
+        with span("agent.prefetch", question_chars=len(question)) as s:
+            entity_future = self._prefetch_executor.submit(
+                contextvars.copy_context().run,
+                self.service_tools.output_entity_hits,
+                question,
+            )
+            cim_class_future = self._prefetch_executor.submit(
+                contextvars.copy_context().run,
+                self.service_tools.cim_class_hits,
+                question,
+            )
+            entity_hits, cim_class_hits = entity_future.result(), cim_class_future.result()
+            s.set_attributes(
+                entity_hits=len(entity_hits), cim_class_hits=len(cim_class_hits)
+            )
+        return entity_hits, cim_class_hits
+
+    async def _aprefetch_hits(
+        self, question: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        with span("agent.prefetch", question_chars=len(question)) as s:
+            entity_hits, cim_class_hits = await asyncio.gather(
+                asyncio.to_thread(self.service_tools.output_entity_hits, question),
+                asyncio.to_thread(self.service_tools.cim_class_hits, question),
+            )
+            s.set_attributes(
+                entity_hits=len(entity_hits), cim_class_hits=len(cim_class_hits)
+            )
+        return entity_hits, cim_class_hits
+
+    @staticmethod
+    def _missing_cim_queries(world_state: WorldState) -> List[str]:
+        return [
+            entity
+            for entity in dict.fromkeys(world_state.required_entities)
+            if entity and entity not in world_state.cim_classes
+        ]
+
+    def _prefetch_required_cim_classes(self, world_state: WorldState) -> WorldState:
+        """
+        为所有 required_entities 检索 CIM 类：一次批量向量请求，向量检索并发执行。
+        """
+        queries = AgentSystem._missing_cim_queries(world_state)
+        if not queries:
+            return world_state
+        with span("agent.prefetch_cim_classes", queries=len(queries)):
+            # 批量写入向量缓存，之后每个检索直接命中
+            self.service_tools.embed_queries(queries)
+            futures = [
+                self._prefetch_executor.submit(
+                    contextvars.copy_context().run,
+                    self.service_tools.cim_class_hits,
+                    query,
+                )
+                for query in queries
+            ]
+            cim_classes = {
+                query: future.result() for query, future in zip(queries, futures)
+            }
+        return world_state.update(cim_classes=cim_classes)
+
+    async def _aprefetch_required_cim_classes(
+        self, world_state: WorldState
+    ) -> WorldState:
+        queries = AgentSystem._missing_cim_queries(world_state)
+        if not queries:
+            return world_state
+        with span("agent.prefetch_cim_classes", queries=len(queries)):
+            await asyncio.to_thread(self.service_tools.embed_queries, queries)
+            hits = await asyncio.gather(
+                *(
+                    asyncio.to_thread(self.service_tools.cim_class_hits, query)
+                    for query in queries
+                )
+            )
+        return world_state.update(cim_classes=dict(zip(queries, hits)))
+
+    @staticmethod
+    def _hit_interface_ids(entity_hits: List[Dict[str, Any]]) -> List[str]:
+        return list(
+            dict.fromkeys(hit["相关接口id"] for hit in entity_hits if hit["相关接口id"])
+        )
+
+    @staticmethod
+    def _prefetch_event(state: WorldState) -> AgentEvent:
+        return AgentEvent(
+            type="prefetch",
+            data={
+                "interfaces": [
+                    {"id": interface_info["id"], "name": interface_info["name"]}
+                    for interface_info in state.interface_history
+                ],
+                "cim_classes": [
+                    cim_class.get("name")
+                    for cim_classes in state.cim_classes.values()
+                    for cim_class in cim_classes
+                ],
+            },
+        )
+
+    def _match_interfaces(self, question: str) -> List[str]:
+        if self.interface_matcher is None:
+            return []
+        matched_ids = self.interface_matcher.match(question)
+        if matched_ids:
+            logger.info(f"Interfaces named in question: {matched_ids}")
+        return matched_ids
+
+    @staticmethod
+    def _trace_run(s, response: RunOutput) -> None:
+        metrics = getattr(response, "metrics", None)
+        s.set_attributes(
+            input_tokens=getattr(metrics, "input_tokens", None),
+            output_tokens=getattr(metrics, "output_tokens", None),
+            tool_calls=len(getattr(response, "tools", None) or []),
+        )
+
+    def _record_step(
+        self,
+        step_records: List[StepRecord],
+        response: RunOutput,
+        search_result: SearchResult,
+        started_at: float,
+        max_step: int,
+    ) -> List[str]:
+        """
+        记录本步结果并由停止策略决定是否继续，返回本步新出现的接口 id。
+        """
+        seen_ids = set()
+        for record in step_records:
+            seen_ids.update(record.interface_ids)
+        previous_tokens = step_records[-1].total_tokens if step_records else 0
+        metrics = getattr(response, "metrics", None)
+        record = StepRecord(
+            step=len(step_records) + 1,
+            interface_ids=list(flatten(search_result.interface_ids)),
+            required_entities=search_result.requied_entities,
+            elapsed=time.monotonic() - started_at,
+            total_tokens=previous_tokens + (getattr(metrics, "total_tokens", 0) or 0),
+        )
+        step_records.append(record)
+
+        record.stopped, record.reason = self.convergence_policy.should_stop(
+            step_records
+        )
+        if not record.stopped and record.step >= max_step:
+            record.stopped, record.reason = True, f"reached max_step={max_step}"
+        logger.info(
+            f"Search step {record.step}: {'stop' if record.stopped else 'continue'} ({record.reason})"
+        )
+        return [
+            interface_id
+            for interface_id in record.interface_ids
+            if interface_id not in seen_ids
+        ]
 
     @staticmethod
     def init_searcher(
         model: Model,
-        uri: str,
-        user: str,
-        password: str,
-        database: str,
+        uri: Optional[str] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        database: Optional[str] = None,
+        *,
         embedding_base_url: str,
+        repository: Optional[GraphRepository] = None,
+        async_tools: bool = False,
+        hybrid_search: bool = False,
     ) -> Agent:
         return Agent(
             name="Search Agent",
@@ -119,6 +609,9 @@ class AgentSystem:
                     database=database,
                     embedding_base_url=embedding_base_url,
                     embedding_model="nvidia-llama-embed-nemotron-8b",
+                    repository=repository,
+                    async_tools=async_tools,
+                    hybrid_search=hybrid_search,
                     enable_search_similar_output_entities=True,
                     enable_search_similar_cim_classes=True,
                 )
@@ -129,6 +622,7 @@ class AgentSystem:
                 "2. search_similar_output_entities: 可以写一个文本语句来描述需要的业务实体，并搜索到目标业务实体及其接口信息",
                 "3. search_similar_cim_classes: 同样可以搜索到CIM类信息，它可以给你某些实体明确的定义",
                 "4. 分析我提供的候选接口信息，和目标业务实体的接口信息，保留所有有助于解决用户问题的接口。",
+                "5. 候选接口和 cim_classes 中已有对原始问题的检索结果，不需要再用原始问题重复搜索。",
             ],
             output_schema=SearchResult,
             use_json_mode=True,
@@ -138,11 +632,15 @@ class AgentSystem:
     @staticmethod
     def init_summarizer(
         model: Model,
-        uri: str,
-        user: str,
-        password: str,
-        database: str,
+        uri: Optional[str] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        database: Optional[str] = None,
+        *,
         embedding_base_url: str,
+        repository: Optional[GraphRepository] = None,
+        async_tools: bool = False,
+        hybrid_search: bool = False,
     ) -> Agent:
         return Agent(
             name="Summarize Agent",
@@ -156,6 +654,9 @@ class AgentSystem:
                     database=database,
                     embedding_base_url=embedding_base_url,
                     embedding_model="nvidia-llama-embed-nemotron-8b",
+                    repository=repository,
+                    async_tools=async_tools,
+                    hybrid_search=hybrid_search,
                     enable_search_similar_cim_classes=True,
                 )
             ],
@@ -163,7 +664,8 @@ class AgentSystem:
                 "1. 我提供了用户原始问题，候选接口信息，和可能需要的业务实体描述。",
                 "2. 给用户一个详细的解决方案，包括调用哪些接口，介绍接口信息，要求用户补充具体的业务实体信息。",
                 "3. 写解决方案时，给用户填写接口调用示例，填入输入和输出信息，让用户明白应该如何调用接口。",
-                "4. 当缺少接口时，你来补充一个适当的接口。为了使补充接口更加严谨，可以使用工具去收集相关CIM类信息作为参考。"
+                "4. 当缺少接口时，你来补充一个适当的接口。为了使补充接口更加严谨，可以使用工具去收集相关CIM类信息作为参考。",
+                "5. cim_classes 中已有按业务实体检索到的CIM类，优先直接使用，只在仍然缺少时再调用工具。",
             ],
             markdown=True,
         )
@@ -0,0 +1,119 @@
+import time
+import threading
+import numpy as np
+
+from typing import Callable, List, Literal, Optional
+from loguru import logger
+from .world_state import WorldState
+
+
+class AnswerCacheEntry:
+    def __init__(
+        self,
+        question: str,
+        embedding: np.ndarray,
+        answer: str,
+        world_state: WorldState,
+        database_version: Optional[int],
+    ) -> None:
+        self.question = question
+        self.embedding = embedding
+        self.answer = answer
+        self.world_state = world_state
+        self.database_version = database_version
+        self.created_at = time.time()
+
+
+class SemanticAnswerCache:
+    """
+    问题级语义缓存：问题向量与缓存问题的 cosine 相似度不低于 threshold 时命中。
+    mode="answer" 直接返回缓存答案；mode="interfaces" 只复用最终的 WorldState，
+    由 summarizer 重新生成答案。条目在 ttl 秒后过期，数据库版本变化时全部失效。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl: float = 24 * 3600,
+        max_entries: int = 1024,
+        mode: Literal["answer", "interfaces"] = "answer",
+        version_check_interval: float = 30.0,
+        get_database_version: Optional[Callable[[], Optional[int]]] = None,
+    ) -> None:
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.mode = mode
+        self.version_check_interval = version_check_interval
+        # AgentSystem 未指定时绑定为其 GraphRepository.version（Neo4j 为 lastCommittedTxId）
+        self.get_database_version = get_database_version
+
+        self._entries: List[AnswerCacheEntry] = []
+        self._lock = threading.Lock()
+        self._database_version: Optional[int] = None
+        self._version_checked_at = float("-inf")
+
+    def _current_version(self) -> Optional[int]:
+        if self.get_database_version is None:
+            return None
+        now = time.monotonic()
+        if now - self._version_checked_at >= self.version_check_interval:
+            self._version_checked_at = now
+            version = self.get_database_version()
+            if version != self._database_version:
+                if self._database_version is not None:
+                    logger.info("Database changed, clear answer cache")
+                    self.clear()
+                self._database_version = version
+        return self._database_version
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, embedding: List[float]) -> Optional[AnswerCacheEntry]:
+        version = self._current_version()
+        query = SemanticAnswerCache._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            self._entries = [
+                entry
+                for entry in self._entries
+                if now - entry.created_at < self.ttl
+                and entry.database_version == version
+            ]
+            if not self._entries:
+                return None
+            scores = np.stack([entry.embedding for entry in self._entries]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            entry = self._entries[best]
+        logger.info(
+            f"Answer cache hit ({scores[best]:.3f}): '{entry.question}'"
+        )
+        return entry
+
+    def store(
+        self,
+        question: str,
+        embedding: List[float],
+        answer: str,
+        world_state: WorldState,
+    ) -> None:
+        entry = AnswerCacheEntry(
+            question=question,
+            embedding=SemanticAnswerCache._normalize(embedding),
+            answer=answer,
+            world_state=world_state,
+            database_version=self._current_version(),
+        )
+        with self._lock:
+            self._entries.append(entry)
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[-self.max_entries :]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
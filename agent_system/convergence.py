@@ -0,0 +1,112 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class StepRecord:
+    step: int
+    interface_ids: List[str]
+    required_entities: List[str]
+    elapsed: float
+    total_tokens: int
+    stopped: bool = False
+    reason: str = ""
+
+
+class ConvergencePolicy(ABC):
+    """
+    搜索循环的停止策略。根据截至当前的每步记录返回 (是否停止, 原因)。
+    """
+
+    @abstractmethod
+    def should_stop(self, records: List[StepRecord]) -> Tuple[bool, str]:
+        ...
+
+
+class AllSeenPolicy(ConvergencePolicy):
+    """本步返回的接口都在之前的步骤中出现过。"""
+
+    def should_stop(self, records: List[StepRecord]) -> Tuple[bool, str]:
+        current = records[-1]
+        seen_ids = set()
+        for record in records[:-1]:
+            seen_ids.update(record.interface_ids)
+        if seen_ids and current.interface_ids and seen_ids.issuperset(current.interface_ids):
+            return True, "all interfaces already seen"
+        return False, f"{len(set(current.interface_ids) - seen_ids)} new interfaces"
+
+
+class JaccardStabilityPolicy(ConvergencePolicy):
+    """连续 patience 步的候选接口集合与上一步的 Jaccard 相似度不低于 threshold。"""
+
+    def __init__(self, threshold: float = 0.8, patience: int = 1) -> None:
+        self.threshold = threshold
+        self.patience = patience
+
+    def should_stop(self, records: List[StepRecord]) -> Tuple[bool, str]:
+        if len(records) <= self.patience:
+            return False, "not enough steps for jaccard stability"
+        similarities = []
+        for previous, current in zip(
+            records[-self.patience - 1 : -1], records[-self.patience :]
+        ):
+            union = set(previous.interface_ids) | set(current.interface_ids)
+            intersection = set(previous.interface_ids) & set(current.interface_ids)
+            similarities.append(len(intersection) / len(union) if union else 1.0)
+        if min(similarities) >= self.threshold:
+            return True, f"candidate set stable (jaccard {min(similarities):.2f})"
+        return False, f"candidate set changing (jaccard {similarities[-1]:.2f})"
+
+
+class NoNewEntitiesPolicy(ConvergencePolicy):
+    """本步没有提出新的 required_entities。"""
+
+    def should_stop(self, records: List[StepRecord]) -> Tuple[bool, str]:
+        if len(records) < 2:
+            return False, "first step"
+        seen_entities = set()
+        for record in records[:-1]:
+            seen_entities.update(record.required_entities)
+        new_entities = set(records[-1].required_entities) - seen_entities
+        if not new_entities:
+            return True, "no new required entities"
+        return False, f"{len(new_entities)} new required entities"
+
+
+class BudgetPolicy(ConvergencePolicy):
+    """耗时或累计 token 超出预算。"""
+
+    def __init__(
+        self, max_seconds: Optional[float] = None, max_tokens: Optional[int] = None
+    ) -> None:
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+
+    def should_stop(self, records: List[StepRecord]) -> Tuple[bool, str]:
+        current = records[-1]
+        if self.max_seconds is not None and current.elapsed >= self.max_seconds:
+            return True, f"time budget exhausted ({current.elapsed:.1f}s)"
+        if self.max_tokens is not None and current.total_tokens >= self.max_tokens:
+            return True, f"token budget exhausted ({current.total_tokens} tokens)"
+        return False, "within budget"
+
+
+class AnyPolicy(ConvergencePolicy):
+    """任意一个子策略要求停止即停止。"""
+
+    def __init__(self, *policies: ConvergencePolicy) -> None:
+        self.policies = policies
+
+    def should_stop(self, records: List[StepRecord]) -> Tuple[bool, str]:
+        reasons = []
+        for policy in self.policies:
+            stop, reason = policy.should_stop(records)
+            if stop:
+                return True, reason
+            reasons.append(reason)
+        return False, "; ".join(reasons)
+
+
+def default_policy() -> ConvergencePolicy:
+    return AnyPolicy(AllSeenPolicy(), JaccardStabilityPolicy(threshold=0.8))
@@ -0,0 +1,97 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional
+from agno.agent import RunOutput
+from .world_state import WorldState
+from .convergence import StepRecord
+
+
+EventType = Literal[
+    "exact_match",
+    "prefetch",
+    "step_started",
+    "tool_call",
+    "interfaces_found",
+    "step_finished",
+    "search_finished",
+    "summary_token",
+    "answer",
+]
+
+
+@dataclass
+class AgentEvent:
+    type: EventType
+    data: Dict[str, Any] = field(default_factory=dict)
+    # search_finished 事件携带最终的 WorldState 和每个搜索步骤的记录（包括继续或停止的原因），不对外序列化
+    state: Optional[WorldState] = field(default=None, repr=False)
+    step_records: List[StepRecord] = field(default_factory=list, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, **self.data}
+
+
+def exact_match_events(state: WorldState) -> List[AgentEvent]:
+    """
+    问题中直接出现了接口：产出 exact_match 事件；只匹配到一个接口时跳过搜索，紧接着产出 search_finished。
+    """
+    events = [
+        AgentEvent(
+            type="exact_match",
+            data={
+                "interfaces": [
+                    {"id": interface_info["id"], "name": interface_info["name"]}
+                    for interface_info in state.interface_history
+                ]
+            },
+        )
+    ]
+    if len(state.interface_history) == 1:
+        events.append(
+            AgentEvent(
+                type="search_finished",
+                data={"steps": 0, "exact_match": True},
+                state=state,
+            )
+        )
+    return events
+
+
+def step_events(
+    response: RunOutput, state: WorldState, record: StepRecord
+) -> List[AgentEvent]:
+    events = [
+        AgentEvent(
+            type="tool_call",
+            data={
+                "step": record.step,
+                "tool": tool.tool_name,
+                "args": tool.tool_args,
+            },
+        )
+        for tool in (getattr(response, "tools", None) or [])
+    ]
+    events.append(
+        AgentEvent(
+            type="interfaces_found",
+            data={
+                "step": record.step,
+                "interfaces": [
+                    {"id": interface_info["id"], "name": interface_info["name"]}
+                    for interface_info in state.interface_history
+                ],
+                "required_entities": state.required_entities,
+            },
+        )
+    )
+    events.append(
+        AgentEvent(
+            type="step_finished",
+            data={
+                "step": record.step,
+                "stopped": record.stopped,
+                "reason": record.reason,
+                "elapsed": record.elapsed,
+            },
+        )
+    )
+    return events
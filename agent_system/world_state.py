@@ -1,4 +1,5 @@
-from typing import Dict, Optional, List
+from typing import Any, Dict, Iterable, Optional, List
+from utils.tokens import estimate_tokens
 import json
 
 
@@ -9,11 +10,14 @@ class WorldState:
         interface_history: List[Dict[str, str]] = None,
         obtained_entities: List[str] = None,
         required_entities: List[str] = None,
+        cim_classes: Dict[str, List[Dict[str, Any]]] = None,
     ):
         self._origin_question = origin_question
         self._interface_history = interface_history or []
         self._obtained_entities = obtained_entities or []
         self._required_entities = required_entities or []
+        # 查询文本 -> 检索到的 CIM 类
+        self._cim_classes = cim_classes or {}
 
     @property
     def origin_question(self) -> str:
@@ -31,6 +35,10 @@ class WorldState:
     def required_entities(self) -> List[str]:
         return self._required_entities
 
+    @property
+    def cim_classes(self) -> Dict[str, List[Dict[str, Any]]]:
+        return self._cim_classes
+
     @property
     def interface_calls(self) -> str:
         interface_calls = []
@@ -53,21 +61,110 @@ class WorldState:
             and self.interface_history == other.interface_history
             and self.obtained_entities == other.obtained_entities
             and self.required_entities == other.required_entities
+            and self.cim_classes == other.cim_classes
         )
 
     def __repr__(self) -> str:
         context = {
             "origin_question": self.origin_question,
             "required_entities": self.required_entities,
-            "candidate_interfaces": self.interface_history,
+            "candidate_interfaces": [
+                WorldState._full_candidate(interface_info)
+                for interface_info in self.interface_history
+            ],
         }
+        if self.cim_classes:
+            context["cim_classes"] = self.cim_classes
         return json.dumps(context, ensure_ascii=False, indent=2)
 
+    def render(
+        self,
+        token_budget: Optional[int] = None,
+        full_description_ids: Optional[Iterable[str]] = None,
+        top_n: int = 3,
+    ) -> str:
+        """
+        紧凑渲染：不缩进，只有新增的和排在前 top_n 的候选接口保留完整描述，
+        其余只保留 id、名称和功能描述。超出 token_budget 时依次压缩：
+        CIM 类只保留名称和描述，候选接口从后往前只保留功能描述，最后 CIM 类只保留名称。
+        token_budget 为 None 时与 repr 相同。
+        """
+        if token_budget is None:
+            return repr(self)
+
+        full_description_ids = set(full_description_ids or [])
+        full_indexes = [
+            i
+            for i, interface_info in enumerate(self.interface_history)
+            if i < top_n or interface_info["id"] in full_description_ids
+        ]
+        candidates = [
+            (
+                WorldState._full_candidate(interface_info)
+                if i in full_indexes
+                else WorldState._brief_candidate(interface_info)
+            )
+            for i, interface_info in enumerate(self.interface_history)
+        ]
+
+        cim_classes = self.cim_classes
+
+        def dumps() -> str:
+            context = {
+                "origin_question": self.origin_question,
+                "required_entities": self.required_entities,
+                "candidate_interfaces": candidates,
+            }
+            if cim_classes:
+                context["cim_classes"] = cim_classes
+            return json.dumps(context, ensure_ascii=False, separators=(",", ":"))
+
+        rendered = dumps()
+        if cim_classes and estimate_tokens(rendered) > token_budget:
+            cim_classes = WorldState._brief_cim_classes(
+                self.cim_classes, fields=("name", "description")
+            )
+            rendered = dumps()
+        while full_indexes and estimate_tokens(rendered) > token_budget:
+            i = full_indexes.pop()
+            candidates[i] = WorldState._brief_candidate(self.interface_history[i])
+            rendered = dumps()
+        if cim_classes and estimate_tokens(rendered) > token_budget:
+            cim_classes = WorldState._brief_cim_classes(self.cim_classes, fields=("name",))
+            rendered = dumps()
+        return rendered
+
+    @staticmethod
+    def _full_candidate(interface_info: Dict[str, str]) -> Dict[str, str]:
+        return {
+            "id": interface_info["id"],
+            "name": interface_info["name"],
+            "description": interface_info["description"],
+        }
+
+    @staticmethod
+    def _brief_cim_classes(
+        cim_classes: Dict[str, List[Dict[str, Any]]], fields: Iterable[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        return {
+            query: [{field: cim_class.get(field) for field in fields} for cim_class in hits]
+            for query, hits in cim_classes.items()
+        }
+
+    @staticmethod
+    def _brief_candidate(interface_info: Dict[str, str]) -> Dict[str, str]:
+        return {
+            "id": interface_info["id"],
+            "name": interface_info["name"],
+            "function_description": interface_info.get("function_description"),
+        }
+
     def update(
         self,
         interface_history: Optional[List[Dict[str, str]]] = None,
         obtained_entities: Optional[List[str]] = None,
         required_entities: Optional[List[str]] = None,
+        cim_classes: Optional[Dict[str, List[Dict[str, Any]]]] = None,
     ) -> "WorldState":
         # 接口
         new_interface_history = self.interface_history.copy()
@@ -86,17 +183,28 @@ class WorldState:
         if obtained_entities:
             new_required_entities = required_entities
 
+        # CIM 类
+        new_cim_classes = {**self.cim_classes, **(cim_classes or {})}
+
         return WorldState(
             origin_question=self.origin_question,
             interface_history=new_interface_history,
             obtained_entities=new_obtained_entities,
             required_entities=new_required_entities,
+            cim_classes=new_cim_classes,
         )
 
+    def with_question(self, origin_question: str) -> "WorldState":
+        """同样的接口和实体，换成新的问题，复用缓存的 WorldState 时使用。"""
+        state = self.copy()
+        state._origin_question = origin_question
+        return state
+
     def copy(self) -> "WorldState":
         return WorldState(
             origin_question=self.origin_question,
             interface_history=self.interface_history.copy(),
             obtained_entities=self.obtained_entities.copy(),
             required_entities=self.required_entities.copy(),
+            cim_classes=self.cim_classes.copy(),
         )
@@ -0,0 +1,259 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import numpy as np
+
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.metrics import Metrics
+from agno.models.response import ModelResponse
+from utils.tokens import estimate_tokens
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """
+    确定性的字符 n-gram 哈希向量：共享字词越多的文本余弦相似度越高，检索结果有意义。
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for n in (1, 2, 3):
+        for i in range(len(text) - n + 1):
+            digest = hashlib.md5(text[i : i + n].encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % dim] += n
+    norm = float(np.linalg.norm(vector))
+    return (vector / norm if norm else vector).tolist()
+
+
+class FakeEmbeddingServer:
+    """
+    本地 OpenAI 兼容的向量服务：POST /v1/embeddings 和 GET /v1/model_dim，每个请求固定延迟。
+    """
+
+    def __init__(
+        self, dim: int = 256, latency: float = 0.02, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.dim = dim
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body: Dict[str, Any]) -> None:
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/model_dim"):
+                    self._send({"embed_dim": server.dim})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/embeddings"):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+                server.requests += 1
+                time.sleep(server.latency)
+                self._send(
+                    {
+                        "object": "list",
+                        "model": body.get("model", "fake"),
+                        "data": [
+                            {
+                                "object": "embedding",
+                                "index": i,
+                                "embedding": fake_embedding(text, server.dim),
+                            }
+                            for i, text in enumerate(texts)
+                        ],
+                        "usage": {
+                            "prompt_tokens": sum(estimate_tokens(t) for t in texts),
+                            "total_tokens": sum(estimate_tokens(t) for t in texts),
+                        },
+                    }
+                )
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def embed(self, text: str) -> List[float]:
+        return fake_embedding(text, self.dim)
+
+    def start(self) -> "FakeEmbeddingServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+# 脚本：根据当前消息列表返回 {"content": str} 或 {"tool_calls": [{"name": ..., "arguments": {...}}]}
+Script = Callable[[List[Message]], Dict[str, Any]]
+
+
+@dataclass
+class ScriptedModel(Model):
+    """
+    按脚本输出的 agno Model，每次调用等待 latency 秒，流式输出时每个片段等待 token_latency 秒。
+    """
+
+    id: str = "scripted-model"
+    name: str = "ScriptedModel"
+    provider: str = "Benchmark"
+    script: Optional[Script] = None
+    latency: float = 0.5
+    token_latency: float = 0.01
+    chunk_size: int = 8
+
+    def _respond(self, messages: List[Message]) -> ModelResponse:
+        output = self.script(messages)
+        input_tokens = sum(estimate_tokens(str(m.content or "")) for m in messages)
+        content = output.get("content")
+        tool_calls = [
+            {
+                "id": f"call_{i}_{int(time.time() * 1e6)}",
+                "type": "function",
+                "function": {
+                    "name": tool_call["name"],
+                    "arguments": json.dumps(tool_call["arguments"], ensure_ascii=False),
+                },
+            }
+            for i, tool_call in enumerate(output.get("tool_calls", []))
+        ]
+        output_tokens = estimate_tokens(content or json.dumps(tool_calls))
+        return ModelResponse(
+            role="assistant",
+            content=content,
+            tool_calls=tool_calls,
+            response_usage=Metrics(
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                total_tokens=input_tokens + output_tokens,
+            ),
+        )
+
+    def _chunks(self, response: ModelResponse) -> List[ModelResponse]:
+        if not response.content:
+            return [response]
+        content = response.content
+        chunks = [
+            ModelResponse(role="assistant", content=content[i : i + self.chunk_size])
+            for i in range(0, len(content), self.chunk_size)
+        ]
+        chunks[-1].response_usage = response.response_usage
+        return chunks
+
+    def invoke(self, messages: List[Message], *args, **kwargs) -> ModelResponse:
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def ainvoke(self, messages: List[Message], *args, **kwargs) -> ModelResponse:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+    def invoke_stream(
+        self, messages: List[Message], *args, **kwargs
+    ) -> Iterator[ModelResponse]:
+        time.sleep(self.latency)
+        for chunk in self._chunks(self._respond(messages)):
+            time.sleep(self.token_latency)
+            yield chunk
+
+    async def ainvoke_stream(
+        self, messages: List[Message], *args, **kwargs
+    ) -> AsyncIterator[ModelResponse]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._respond(messages)):
+            await asyncio.sleep(self.token_latency)
+            yield chunk
+
+    def _parse_provider_response(self, response: Any, **kwargs) -> ModelResponse:
+        return response
+
+    def _parse_provider_response_delta(self, response: Any) -> ModelResponse:
+        return response
+
+
+def _current_turn(messages: List[Message]):
+    user_index = max(i for i, m in enumerate(messages) if m.role == "user")
+    turn_messages = messages[user_index + 1 :]
+    return messages[user_index], turn_messages
+
+
+def search_script(messages: List[Message]) -> Dict[str, Any]:
+    """
+    模拟搜索 Agent：第一步先调用两个检索工具，拿到结果后返回候选接口；
+    之后的步骤原样保留已有候选接口，使搜索循环收敛。
+    """
+    user_message, turn_messages = _current_turn(messages)
+    state = json.loads(user_message.content)
+    candidate_ids = [c["id"] for c in state.get("candidate_interfaces", [])]
+
+    tool_messages = [m for m in turn_messages if m.role == "tool"]
+    if not candidate_ids and not tool_messages:
+        question = state["origin_question"]
+        return {
+            "tool_calls": [
+                {
+                    "name": "search_similar_output_entities",
+                    "arguments": {"query": question, "top_k": 3},
+                },
+                {
+                    "name": "search_similar_cim_classes",
+                    "arguments": {"query": question, "top_k": 3},
+                },
+            ]
+        }
+
+    for message in tool_messages:
+        try:
+            results = json.loads(message.content)
+        except (TypeError, ValueError):
+            continue
+        for result in results:
+            if isinstance(result, dict) and result.get("相关接口id"):
+                candidate_ids.append(result["相关接口id"])
+    return {
+        "content": json.dumps(
+            {
+                "interface_ids": list(dict.fromkeys(candidate_ids)),
+                "requied_entities": [],
+            },
+            ensure_ascii=False,
+        )
+    }
+
+
+def summarize_script(messages: List[Message]) -> Dict[str, Any]:
+    user_message, _ = _current_turn(messages)
+    try:
+        state = json.loads(user_message.content)
+    except (TypeError, ValueError):
+        state = {"candidate_interfaces": []}
+    lines = ["解决方案：依次调用以下接口。"]
+    for i, candidate in enumerate(state.get("candidate_interfaces", []), 1):
+        lines.append(f"{i}. {candidate['name']}（{candidate['id']}）")
+    return {"content": "\n".join(lines)}
@@ -0,0 +1,216 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import tempfile
+
+# 每次运行使用独立的向量缓存和 manifest，不影响线上数据；运行结束后删除
+BENCH_TMP_DIR = tempfile.TemporaryDirectory(prefix="ainvoker-bench-")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(BENCH_TMP_DIR.name, "embeddings.sqlite3")
+os.environ["EMBEDDING_MANIFEST_PATH"] = os.path.join(
+    BENCH_TMP_DIR.name, "embedding_manifest.json"
+)
+
+import json
+import time
+import asyncio
+import argparse
+import threading
+import numpy as np
+
+from collections import defaultdict
+from typing import Dict, List
+from loguru import logger
+from agent_system import AgentSystem
+from benchmark.fakes import FakeEmbeddingServer, ScriptedModel, search_script, summarize_script
+from benchmark.seed_graph import (
+    EMBEDDING_DIM,
+    NEO4J_DATABASE,
+    NEO4J_PASSWORD,
+    NEO4J_URI,
+    NEO4J_USER,
+    VECTOR_INDEX_DIR,
+    seed_graph,
+    seed_snapshot,
+)
+from utils.drivers import get_driver
+from utils.graph_repository import (
+    GraphRepository,
+    Neo4jGraphRepository,
+    SnapshotGraphRepository,
+)
+from utils.tracing import Span, get_tracer
+
+QUESTIONS_FILE = os.path.join(os.path.dirname(__file__), "data", "questions.json")
+PERCENTILES = (50, 95, 99)
+
+
+class SpanCollector:
+    def __init__(self) -> None:
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        with self._lock:
+            self.durations[span.name].append(span.duration)
+
+
+def summarize(durations: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    report = {}
+    for name, values in sorted(durations.items()):
+        percentiles = np.percentile(values, PERCENTILES)
+        report[name] = {
+            "count": len(values),
+            **{f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, percentiles)},
+        }
+    return report
+
+
+def print_table(title: str, report: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{title}")
+    width = max([len(name) for name in report] + [10])
+    print(f"{'':<{width}}  {'count':>6}" + "".join(f"  {f'p{p}':>9}" for p in PERCENTILES))
+    for name, row in report.items():
+        print(
+            f"{name:<{width}}  {row['count']:>6}"
+            + "".join(f"  {row[f'p{p}'] * 1000:>7.1f}ms" for p in PERCENTILES)
+        )
+
+
+async def run_questions(
+    agent_system: AgentSystem,
+    questions: List[str],
+    repeat: int,
+    concurrency: int,
+    max_step: int,
+) -> Dict[str, List[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    question_durations: Dict[str, List[float]] = defaultdict(list)
+
+    async def ask(question: str):
+        async with semaphore:
+            started_at = time.perf_counter()
+            await agent_system.aresponse(question=question, max_step=max_step)
+            question_durations[question].append(time.perf_counter() - started_at)
+
+    for _ in range(repeat):
+        await asyncio.gather(*(ask(question) for question in questions))
+    return question_durations
+
+
+def build_repository(args: argparse.Namespace) -> GraphRepository:
+    if not args.neo4j:
+        # 默认不依赖数据库：基准图写成临时目录中的快照，在进程内检索
+        snapshot_path = os.path.join(BENCH_TMP_DIR.name, "graph_snapshot.npz")
+        seed_snapshot(snapshot_path, dim=EMBEDDING_DIM)
+        return SnapshotGraphRepository(snapshot_path)
+
+    if args.seed:
+        driver = get_driver(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
+        seed_graph(driver=driver, database=NEO4J_DATABASE, force=args.force)
+    # 与 seed_graph 导出基准向量文件的目录相同（BENCH_VECTOR_INDEX_DIR）
+    return Neo4jGraphRepository(
+        uri=NEO4J_URI,
+        user=NEO4J_USER,
+        password=NEO4J_PASSWORD,
+        database=NEO4J_DATABASE,
+        use_local_vector_index=args.local_vector_index,
+        vector_index_dir=VECTOR_INDEX_DIR,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AgentSystem 端到端延迟基准")
+    parser.add_argument(
+        "--neo4j", action="store_true", help="使用 BENCH_NEO4J_* 指定的 Neo4j，而不是内存快照"
+    )
+    parser.add_argument("--seed", action="store_true", help="--neo4j 时运行前写入基准图")
+    parser.add_argument("--force", action="store_true", help="允许 --seed 清空非基准数据")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-step", type=int, default=3)
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--summarize-latency", type=float, default=0.8)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    parser.add_argument(
+        "--local-vector-index", action="store_true", help="--neo4j 时使用本地向量文件检索"
+    )
+    parser.add_argument(
+        "--hybrid-search", action="store_true", help="业务实体检索融合 BM25 词法结果"
+    )
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    repository = build_repository(args)
+    with open(QUESTIONS_FILE, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    embedding_server = FakeEmbeddingServer(
+        dim=EMBEDDING_DIM, latency=args.embedding_latency
+    ).start()
+    collector = SpanCollector()
+    get_tracer().add_listener(collector)
+    try:
+        agent_system = AgentSystem(
+            search_model=ScriptedModel(
+                id="scripted-search",
+                script=search_script,
+                latency=args.search_latency,
+                token_latency=args.token_latency,
+            ),
+            summarize_model=ScriptedModel(
+                id="scripted-summarize",
+                script=summarize_script,
+                latency=args.summarize_latency,
+                token_latency=args.token_latency,
+            ),
+            embedding_base_url=embedding_server.base_url,
+            repository=repository,
+            hybrid_search=args.hybrid_search,
+        )
+        started_at = time.perf_counter()
+        question_durations = asyncio.run(
+            run_questions(
+                agent_system=agent_system,
+                questions=questions,
+                repeat=args.repeat,
+                concurrency=args.concurrency,
+                max_step=args.max_step,
+            )
+        )
+        elapsed = time.perf_counter() - started_at
+    finally:
+        get_tracer().remove_listener(collector)
+        embedding_server.stop()
+
+    stages = summarize(collector.durations)
+    per_question = summarize(question_durations)
+    total = len(questions) * args.repeat
+    print_table("Stages", stages)
+    print_table("Questions", per_question)
+    print(
+        f"\n{total} questions in {elapsed:.2f}s ({total / elapsed:.2f} q/s), "
+        f"{embedding_server.requests} embedding requests"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "config": vars(args),
+                    "elapsed": elapsed,
+                    "embedding_requests": embedding_server.requests,
+                    "stages": stages,
+                    "questions": per_question,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        logger.info(f"Benchmark result written to {args.output}")
+
+
+if __name__ == "__main__":
+    with BENCH_TMP_DIR:
+        main()
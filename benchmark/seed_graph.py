@@ -0,0 +1,195 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+# 单独运行时基准图的向量索引名和属性读自基准自己的 manifest，不跟随线上的版本切换；
+# run_benchmark 在导入前已指向临时目录
+os.environ.setdefault(
+    "EMBEDDING_MANIFEST_PATH", "./.cache/benchmark/embedding_manifest.json"
+)
+
+import json
+import argparse
+from typing import Any, Dict, List
+from neo4j import Driver
+from loguru import logger
+from benchmark.fakes import fake_embedding
+from utils.drivers import get_driver
+from utils.embedding_storage import vector_index_alias
+from utils.graph_repository import write_snapshot
+from utils.vector_index import export_vector_index
+
+SEED_FILE = os.path.join(os.path.dirname(__file__), "data", "seed_graph.json")
+EMBEDDING_DIM = 256
+
+NEO4J_URI = os.getenv("BENCH_NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = os.getenv("BENCH_NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.getenv("BENCH_NEO4J_PASSWORD", "12345678")
+NEO4J_DATABASE = os.getenv("BENCH_NEO4J_DATABASE", "benchmark")
+# 与线上导出的向量文件分开存放
+VECTOR_INDEX_DIR = os.getenv("BENCH_VECTOR_INDEX_DIR", "./.cache/benchmark/vector_index")
+
+# 与 embed/embed_service-list.py 的嵌入文本保持一致
+LABEL_TO_PROPERTIES_DICT = {
+    "Interface": ["name", "standard_name", "llm_description"],
+    "CIMClass": ["name", "description"],
+    "InputEntity": ["name", "llm_function_description"],
+    "OutputEntity": ["name", "llm_function_description"],
+}
+
+
+def embedding_text(label: str, properties: Dict[str, Any]) -> str:
+    texts = [
+        str(properties.get(prop, "")).strip() for prop in LABEL_TO_PROPERTIES_DICT[label]
+    ]
+    return " ".join(filter(None, texts))
+
+
+def build_nodes(seed: Dict[str, Any], dim: int) -> Dict[str, List[Dict[str, Any]]]:
+    nodes: Dict[str, List[Dict[str, Any]]] = {label: [] for label in LABEL_TO_PROPERTIES_DICT}
+    for interface in seed["interfaces"]:
+        nodes["Interface"].append(
+            {
+                key: interface[key]
+                for key in (
+                    "id",
+                    "name",
+                    "standard_name",
+                    "code",
+                    "production_url",
+                    "llm_function_description",
+                    "llm_description",
+                )
+            }
+        )
+        for label, direction, entities in (
+            ("InputEntity", "in", interface["input_entities"]),
+            ("OutputEntity", "out", interface["output_entities"]),
+        ):
+            for i, (name, description) in enumerate(entities.items()):
+                nodes[label].append(
+                    {
+                        "id": f"{interface['id']}-{direction}-{i}",
+                        "interface_id": interface["id"],
+                        "name": name,
+                        "description": description,
+                        "llm_function_description": description,
+                    }
+                )
+    nodes["CIMClass"] = [dict(cim_class) for cim_class in seed["cim_classes"]]
+
+    for label, label_nodes in nodes.items():
+        for node in label_nodes:
+            node["embedding"] = fake_embedding(embedding_text(label, node), dim)
+            node["benchmark_seed"] = True
+    return nodes
+
+
+def load_seed() -> Dict[str, Any]:
+    with open(SEED_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def seed_snapshot(path: str, dim: int = EMBEDDING_DIM) -> Dict[str, int]:
+    """不需要 Neo4j：把基准图直接写成 SnapshotGraphRepository 读取的快照文件。"""
+    nodes = build_nodes(load_seed(), dim)
+    edges = {
+        (relation, label): [(node["interface_id"], node["id"]) for node in nodes[label]]
+        for relation, label in (
+            ("INPUT_ENTITY", "InputEntity"),
+            ("OUTPUT_ENTITY", "OutputEntity"),
+        )
+    }
+    return write_snapshot(
+        path=path,
+        nodes=nodes,
+        vectors={
+            label: [node["embedding"] for node in label_nodes]
+            for label, label_nodes in nodes.items()
+        },
+        edges=edges,
+        manifest={"database": "benchmark_seed"},
+    )
+
+
+def seed_graph(driver: Driver, database: str, dim: int = EMBEDDING_DIM, force: bool = False):
+    nodes = build_nodes(load_seed(), dim)
+    # 与查询侧一致，使用 manifest 中各 label 当前的向量索引名、属性和本地文件名
+    aliases = {label: vector_index_alias(label) for label in nodes}
+
+    with driver.session(database=database) as session:
+        foreign = session.run(
+            "MATCH (n) WHERE n.benchmark_seed IS NULL RETURN count(n) AS count"
+        ).single()["count"]
+        if foreign and not force:
+            raise RuntimeError(
+                f"Database '{database}' contains {foreign} non-benchmark nodes, use --force to overwrite"
+            )
+        session.run("MATCH (n) DETACH DELETE n")
+
+        for label, label_nodes in nodes.items():
+            vector_property = aliases[label]["property"]
+            session.run(
+                f"UNWIND $nodes AS node CREATE (n:`{label}`) SET n = node",
+                nodes=[
+                    {
+                        **{k: v for k, v in node.items() if k != "embedding"},
+                        vector_property: node["embedding"],
+                    }
+                    for node in label_nodes
+                ],
+            )
+        for label, relation in (
+            ("InputEntity", "INPUT_ENTITY"),
+            ("OutputEntity", "OUTPUT_ENTITY"),
+        ):
+            session.run(
+                f"""
+                MATCH (e:`{label}`), (i:Interface {{id: e.interface_id}})
+                CREATE (i)-[:{relation}]->(e)
+                """
+            )
+
+        for label in nodes:
+            index_name = aliases[label]["index"]
+            session.run(f"DROP INDEX `{index_name}` IF EXISTS")
+            session.run(
+                f"""
+                CREATE VECTOR INDEX `{index_name}`
+                FOR (n:`{label}`) ON (n.`{aliases[label]['property']}`)
+                OPTIONS {{indexConfig: {{
+                    `vector.dimensions`: $dim,
+                    `vector.similarity_function`: 'cosine'
+                }}}}
+                """,
+                dim=dim,
+            )
+        session.run("CALL db.awaitIndexes(300)")
+
+    for label in nodes:
+        export_vector_index(
+            driver=driver,
+            database=database,
+            label=label,
+            directory=VECTOR_INDEX_DIR,
+            embedding_property=aliases[label]["property"],
+            name=aliases[label]["local_index"],
+        )
+    logger.info(
+        ", ".join(f"{label}: {len(label_nodes)}" for label, label_nodes in nodes.items())
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="写入基准测试用的小型服务图")
+    parser.add_argument("--database", default=NEO4J_DATABASE)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--force", action="store_true", help="清空包含非基准数据的数据库")
+    args = parser.parse_args()
+
+    driver = get_driver(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, args.database)
+    seed_graph(driver=driver, database=args.database, dim=args.dim, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
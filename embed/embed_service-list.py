@@ -1,11 +1,27 @@
 import sys, os
 
 sys.path.append(os.getcwd())
-import numpy as np
+import json
+import time
+import queue
+import hashlib
+import threading
 from neo4j import GraphDatabase, Driver
-from neo4j_haystack.document_stores import Neo4jDocumentStore
-from utils.utils import openai_embedding, get_embedding_dimension
-from collections import defaultdict
+from utils.utils import openai_embeddings, get_embedding_dimension
+from utils.tokens import estimate_tokens
+from utils.gateway import get_gateway
+from utils.vector_index import (
+    export_vector_index,
+    remove_vector_index,
+    vector_index_exists,
+)
+from utils.embedding_storage import (
+    EmbeddingStorage,
+    load_manifest,
+    save_manifest,
+    update_vector_index_alias,
+    vector_index_alias,
+)
 from tqdm import tqdm
 from loguru import logger
 
@@ -27,7 +43,23 @@ LABEL_TO_PROPERTIES_DICT = {
 }
 
 EMBEDDING_MODEL_NAME = "nvidia-llama-embed-nemotron-8b"
-BATCH_SIZE = 1
+# 每个 embeddings.create 请求最多的文本数和估计 token 数
+BATCH_SIZE = 64
+BATCH_MAX_TOKENS = 16384
+# 同时进行的嵌入请求数
+MAX_CONCURRENCY = 4
+# EMBEDDING_DTYPE=float32|float16|int8, EMBEDDING_DIMENSIONS=1024 等；
+# 可先用 embed/embedding_recall_report.py 比较各种存储方式的召回率和大小
+EMBEDDING_STORAGE = EmbeddingStorage.from_env()
+# 默认只嵌入新增或文本变化的节点，FORCE_REEMBED=1 时全部重新嵌入
+FORCE_REEMBED = os.getenv("FORCE_REEMBED", "0") == "1"
+# 流式读取时每次从 Neo4j 拉取的记录数，也是读取阶段每页的节点数
+FETCH_PAGE_SIZE = 1000
+# 每个写事务最多的节点数，多个嵌入批次合并写入
+WRITE_BATCH_SIZE = 512
+# 新版本向量索引等待 ONLINE 的最长时间，以及切换后删除旧索引前等待进行中查询结束的时间（秒）
+INDEX_ONLINE_TIMEOUT = 3600
+INDEX_SWAP_GRACE_SECONDS = 30
 
 
 def connect_to_database(uri: str, user: str, password: str, database: str):
@@ -36,41 +68,146 @@ def connect_to_database(uri: str, user: str, password: str, database: str):
     logger.info(f"Connected to database: {database}")
     return driver
 
-def fetch_all_nodes_by_label(driver, database_name):
-    nodes_by_label = defaultdict(list)
-    query = "MATCH (n) WHERE size(labels(n)) > 0 RETURN n, elementId(n) AS internal_id"
+def count_nodes(driver, database_name, label) -> int:
     with driver.session(database=database_name) as session:
-        result = session.run(query)
-        for record in result:
-            node = record["n"]
-            internal_id = record["internal_id"]
-            try:
-                label = next(iter(node.labels))
-            except StopIteration:
-                continue
-            properties = dict(node)
-            properties["_neo4j_internal_id"] = internal_id
-            
-            nodes_by_label[label].append(properties)
-            
-    return nodes_by_label
-
-
-def write_embeddings_to_db(driver, batch, database_name):
+        return session.run(f"MATCH (n:`{label}`) RETURN count(n) AS count").single()["count"]
+
+
+def iter_node_pages(
+    driver,
+    database_name,
+    label,
+    properties,
+    page_size: int = FETCH_PAGE_SIZE,
+    embedding_property: str = "embedding",
+):
+    """
+    一次查询流式读取一个 label 的节点，每 page_size 个节点产出一页。Bolt 按 fetch_size 分批拉取，
+    客户端只缓冲一批，下游阻塞时不再拉取；只返回需要嵌入的属性、已保存的指纹和是否已有向量，不传输向量本身。
+    """
+    projection = ", ".join(f".`{prop}`" for prop in [*properties, "embedding_fingerprint"])
+    query = f"""
+    MATCH (n:`{label}`)
+    RETURN elementId(n) AS internal_id,
+           n {{{projection}}} AS properties,
+           n.`{embedding_property}` IS NOT NULL AS has_embedding
+    """
+    with driver.session(database=database_name, fetch_size=page_size) as session:
+        page = []
+        for record in session.run(query):
+            page.append(record.data())
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+
+def embedding_fingerprint(text: str, model_name: str, storage: EmbeddingStorage) -> str:
+    # 嵌入文本、模型或截断维度任一变化时指纹不同
+    content = json.dumps([model_name, storage.dimensions, text], ensure_ascii=False)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+
+def write_embeddings_to_db(
+    driver, batch, database_name, model_name, embedding_property: str = "embedding"
+):
+    # setNodeVectorProperty 以 float32 数组保存，比直接 SET 的 float64 列表小一半；
+    # 向量和指纹在同一个事务中写入，每批写完即为一个检查点，中断后重跑会跳过已写入的节点
     query = """
     UNWIND $batch AS data
     MATCH (n)
     WHERE elementId(n) = data.id
-    SET n.embedding = data.vector
+    SET n.embedding_fingerprint = data.fingerprint, n.embedding_model = $model
+    WITH n, data
+    CALL db.create.setNodeVectorProperty(n, $property, data.vector)
     """
-    params = {"batch": [{"id": id, "vector": vector.tolist()} for id, vector in batch]}
+    params = {
+        "batch": [
+            {"id": id, "vector": vector.tolist(), "fingerprint": fingerprint}
+            for id, vector, fingerprint in batch
+        ],
+        "model": model_name,
+        "property": embedding_property,
+    }
     with driver.session(database=database_name) as session:
-        session.run(query, params)
+        session.run(query, params).consume()
+
+
+def vector_index_dimensions(driver, database, index_name):
+    with driver.session(database=database) as session:
+        record = session.run(
+            """
+            SHOW INDEXES YIELD name, options
+            WHERE name = $index_name
+            RETURN options
+            """,
+            index_name=index_name,
+        ).single()
+    if record is None:
+        return None
+    return (record["options"].get("indexConfig") or {}).get("vector.dimensions")
 
 
 from neo4j import GraphDatabase
 
 
+def create_vector_index(driver, database, label, index_name, embedding_property, dimensions):
+    with driver.session(database=database) as session:
+        session.run(
+            f"""
+            CREATE VECTOR INDEX `{index_name}` IF NOT EXISTS
+            FOR (n:`{label}`) ON (n.`{embedding_property}`)
+            OPTIONS {{indexConfig: {{
+                `vector.dimensions`: $dimensions,
+                `vector.similarity_function`: 'cosine'
+            }}}}
+            """,
+            dimensions=dimensions,
+        ).consume()
+        # 索引填充完成前不切换
+        session.run(
+            "CALL db.awaitIndex($index_name, $timeout)",
+            index_name=index_name,
+            timeout=INDEX_ONLINE_TIMEOUT,
+        ).consume()
+    logger.info(f"Vector index '{index_name}' is ONLINE")
+
+
+def shadow_vector_index(driver, database, label, dimensions):
+    """
+    label 的新版本索引名和向量属性，记录在 manifest 中；
+    上次中断的同维度版本继续使用，已写入的节点不再重新嵌入。
+    """
+    shadow = load_manifest().get("vector_indexes", {}).get(label, {}).get("shadow")
+    if shadow and shadow["dimensions"] == dimensions:
+        return shadow
+    if shadow:
+        retire_vector_index(driver, database, label, shadow)
+    version = time.strftime("%Y%m%d%H%M%S")
+    shadow = {
+        "index": f"{label}-embedding-{version}",
+        "property": f"embedding_{version}",
+        "dimensions": dimensions,
+    }
+    update_vector_index_alias(label, shadow=shadow)
+    return shadow
+
+
+def retire_vector_index(driver, database, label, alias):
+    """删除已切换掉的旧索引、向量属性和本地向量文件。"""
+    drop_index(driver=driver, database=database, index_name=alias["index"])
+    remove_vector_index(alias.get("local_index", alias["index"]))
+    with driver.session(database=database) as session:
+        session.run(
+            f"""
+            MATCH (n:`{label}`) WHERE n.`{alias['property']}` IS NOT NULL
+            CALL {{ WITH n REMOVE n.`{alias['property']}` }} IN TRANSACTIONS OF 10000 ROWS
+            """
+        ).consume()
+    logger.info(f"Removed '{label}' vector property '{alias['property']}'")
+
+
 def drop_index(driver, database, index_name):
     with driver.session(database=database) as session:
         indexes = session.run("SHOW INDEXES").data()
@@ -89,81 +226,371 @@ def drop_index(driver, database, index_name):
             return False
 
 
+def make_batches(items, max_batch_size: int, max_batch_tokens: int):
+    """
+    按文本长度排序后打包：长度相近的文本在同一批，每批不超过 max_batch_size 条和 max_batch_tokens 个 token。
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for item in sorted(items, key=lambda item: estimate_tokens(item[1])):
+        tokens = estimate_tokens(item[1])
+        if batch and (
+            len(batch) >= max_batch_size or batch_tokens + tokens > max_batch_tokens
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class StageCounter:
+    """流水线某一阶段处理的节点数和累计耗时，多线程共享。"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.items = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items: int, seconds: float) -> None:
+        with self._lock:
+            self.items += items
+            self.seconds += seconds
+
+    def report(self, elapsed: float) -> str:
+        rate = self.items / elapsed if elapsed > 0 else 0.0
+        return f"{self.name}: {self.items} nodes, {self.seconds:.1f}s busy, {rate:.1f} nodes/s"
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    # 下游出错时不再阻塞在满的队列上
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return None
+
+
+def run_embedding_pipeline(
+    driver: Driver,
+    database_name: str,
+    label: str,
+    props_to_use: list,
+    embedding_base_url: str,
+    model_name: str,
+    batch_size: int,
+    max_concurrency: int,
+    page_size: int,
+    write_batch_size: int,
+    progress: tqdm,
+    embedding_property: str = "embedding",
+):
+    """
+    读取 -> 嵌入 -> 写入 三个阶段通过有界队列并行：一个线程分页读取并打包，
+    max_concurrency 个线程请求嵌入，调用线程合并为更大的事务写入 Neo4j。
+    返回 (写入数, 跳过数, 各阶段计数)。
+    """
+    embed_queue: queue.Queue = queue.Queue(maxsize=max_concurrency * 2)
+    write_queue: queue.Queue = queue.Queue(maxsize=max_concurrency * 2)
+    stop = threading.Event()
+    errors = []
+    skipped = 0
+    read_counter = StageCounter("read")
+    embed_counter = StageCounter("embed")
+    write_counter = StageCounter("write")
+
+    def read():
+        nonlocal skipped
+        example_logged = False
+        pages = None
+        try:
+            pages = iter_node_pages(
+                driver,
+                database_name,
+                label,
+                props_to_use,
+                page_size=page_size,
+                embedding_property=embedding_property,
+            )
+            while not stop.is_set():
+                started = time.perf_counter()
+                page = next(pages, None)
+                if page is None:
+                    return
+                nodes_to_process = []
+                for record in page:
+                    node_properties = record["properties"]
+                    texts_to_embed = [
+                        str(node_properties.get(prop) or "").strip()
+                        for prop in props_to_use
+                    ]
+                    combined_text = " ".join(filter(None, texts_to_embed))
+
+                    if not combined_text:
+                        continue
+                    fingerprint = embedding_fingerprint(
+                        combined_text, model_name=model_name, storage=EMBEDDING_STORAGE
+                    )
+                    if (
+                        not FORCE_REEMBED
+                        and node_properties.get("embedding_fingerprint") == fingerprint
+                        and record["has_embedding"]
+                    ):
+                        skipped += 1
+                        continue
+                    nodes_to_process.append(
+                        (record["internal_id"], combined_text, fingerprint)
+                    )
+                read_counter.add(len(page), time.perf_counter() - started)
+                progress.update(len(page) - len(nodes_to_process))
+
+                if nodes_to_process and not example_logged:
+                    logger.info(f"\nExample text for label '{label}'")
+                    logger.info(nodes_to_process[0][1])
+                    example_logged = True
+                for batch in make_batches(
+                    nodes_to_process,
+                    max_batch_size=batch_size,
+                    max_batch_tokens=BATCH_MAX_TOKENS,
+                ):
+                    if not _put(embed_queue, batch, stop):
+                        return
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            # 提前结束时关闭读取的会话
+            if pages is not None:
+                pages.close()
+            for _ in range(max_concurrency):
+                _put(embed_queue, None, stop)
+
+    def embed():
+        try:
+            while not stop.is_set():
+                batch = _get(embed_queue, stop)
+                if batch is None:
+                    return
+                started = time.perf_counter()
+                embeddings = openai_embeddings(
+                    embedding_base_url=embedding_base_url,
+                    model=model_name,
+                    texts=[item[1] for item in batch],
+                )
+                embed_counter.add(len(batch), time.perf_counter() - started)
+                if not _put(write_queue, (batch, embeddings), stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    def write(pending):
+        started = time.perf_counter()
+        write_embeddings_to_db(
+            driver, pending, database_name, model_name, embedding_property
+        )
+        write_counter.add(len(pending), time.perf_counter() - started)
+        progress.update(len(pending))
+
+    get_gateway().configure_endpoint(embedding_base_url, max_concurrency=max_concurrency)
+    reader = threading.Thread(target=read, name=f"embed-read-{label}", daemon=True)
+    embedders = [
+        threading.Thread(target=embed, name=f"embed-{label}-{i}", daemon=True)
+        for i in range(max_concurrency)
+    ]
+    reader.start()
+    for embedder in embedders:
+        embedder.start()
+
+    def close_write_queue():
+        for embedder in embedders:
+            embedder.join()
+        _put(write_queue, None, stop)
+
+    closer = threading.Thread(target=close_write_queue, daemon=True)
+    closer.start()
+
+    pending = []
+
+    def collect(item):
+        nonlocal pending
+        batch, embeddings = item
+        pending.extend(
+            (node[0], vector, node[2])
+            for node, vector in zip(batch, EMBEDDING_STORAGE.truncate(embeddings))
+        )
+        if len(pending) >= write_batch_size:
+            write(pending)
+            pending = []
+
+    try:
+        while True:
+            item = _get(write_queue, stop)
+            if item is None:
+                break
+            collect(item)
+        # 上游出错时队列中已完成的向量仍然写入，重跑时跳过
+        closer.join()
+        while True:
+            try:
+                item = write_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                collect(item)
+        if pending:
+            write(pending)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        reader.join()
+        closer.join()
+    if errors:
+        raise errors[0]
+    return write_counter.items, skipped, (read_counter, embed_counter, write_counter)
+
+
 def generate_and_write_embeddings(
-    nodes_by_label: dict,
     label_to_properties: dict,
     driver: Driver,
     database_name: str,
     embedding_base_url: str,
     model_name: str,
     batch_size: int,
+    max_concurrency: int = MAX_CONCURRENCY,
+    page_size: int = FETCH_PAGE_SIZE,
+    write_batch_size: int = WRITE_BATCH_SIZE,
 ):
     embedding_dim = get_embedding_dimension(embedding_base_url=embedding_base_url)
+    index_dim = EMBEDDING_STORAGE.dimensions or embedding_dim
     total_processed = 0
+    total_skipped = 0
+    # (label, 旧索引, 新索引)
+    swaps = []
+    # 只改变精度时节点上的向量不变，但本地向量文件需要按新精度重新导出
+    storage_changed = load_manifest().get("storage") != EMBEDDING_STORAGE.to_dict()
 
-    for label, nodes_list in nodes_by_label.items():
-        if label not in label_to_properties:
+    for label, props_to_use in label_to_properties.items():
+        node_count = count_nodes(driver, database_name, label)
+        if node_count == 0:
             continue
 
-        props_to_use = label_to_properties[label]
-        nodes_to_process = []
-
-        for node_properties in nodes_list:
-            internal_id = node_properties.pop("_neo4j_internal_id")
-            texts_to_embed = [
-                str(node_properties.get(prop, "")).strip() for prop in props_to_use
-            ]
-            combined_text = " ".join(filter(None, texts_to_embed))
+        # 维度变化或索引不存在时在现有索引旁构建新版本，线上查询继续使用旧索引
+        alias = vector_index_alias(label)
+        target = alias
+        if vector_index_dimensions(driver, database_name, alias["index"]) != index_dim:
+            target = shadow_vector_index(driver, database_name, label, index_dim)
+            logger.info(
+                f"Building '{label}' vector index {target['index']} next to {alias['index']}"
+            )
 
-            if combined_text:
-                nodes_to_process.append((internal_id, combined_text))
+        started = time.perf_counter()
+        with tqdm(
+            total=node_count,
+            desc=f"Generating embeddings for label: {label}",
+        ) as progress:
+            label_processed, label_skipped, counters = run_embedding_pipeline(
+                driver=driver,
+                database_name=database_name,
+                label=label,
+                props_to_use=props_to_use,
+                embedding_base_url=embedding_base_url,
+                model_name=model_name,
+                batch_size=batch_size,
+                max_concurrency=max_concurrency,
+                page_size=page_size,
+                write_batch_size=write_batch_size,
+                progress=progress,
+                embedding_property=target["property"],
+            )
+        elapsed = time.perf_counter() - started
+        for counter in counters:
+            logger.info(f"'{label}' {counter.report(elapsed)}")
+        total_skipped += label_skipped
+        total_processed += label_processed
 
-        if not nodes_to_process:
+        if target is not alias:
+            create_vector_index(
+                driver,
+                database_name,
+                label,
+                index_name=target["index"],
+                embedding_property=target["property"],
+                dimensions=index_dim,
+            )
+            # 本地向量文件同样导出为新版本的文件名，切换前线上仍读取旧文件
+            export_vector_index(
+                driver=driver,
+                database=database_name,
+                label=label,
+                storage=EMBEDDING_STORAGE,
+                embedding_property=target["property"],
+                name=target["index"],
+            )
+            swaps.append((label, alias, target))
             continue
 
-        logger.info(f"\nExample text for label '{label}'")
-        logger.info(nodes_to_process[0][1])
-
-        for i in tqdm(
-            range(0, len(nodes_to_process), batch_size),
-            desc=f"Generating embeddings for label: {label}",
+        # 向量索引随节点属性自动更新；在线服务的 NumpyVectorIndex 检测到导出文件更新后自动重新加载
+        if (
+            label_processed
+            or storage_changed
+            or not vector_index_exists(alias["local_index"])
         ):
-            batch = nodes_to_process[i : i + batch_size]
-            ids = [item[0] for item in batch]
-            texts = [item[1] for item in batch]
-
-            embeddings = np.array(
-                [
-                    openai_embedding(
-                        embedding_base_url=embedding_base_url,
-                        model=model_name,
-                        text=text,
-                    )
-                    for text in texts
-                ]
+            export_vector_index(
+                driver=driver,
+                database=database_name,
+                label=label,
+                storage=EMBEDDING_STORAGE,
+                embedding_property=target["property"],
+                name=alias["local_index"],
             )
+        if not label_processed:
+            logger.info(f"'{label}' embeddings are up to date")
 
-            batch_to_write = list(zip(ids, embeddings))
-            write_embeddings_to_db(driver, batch_to_write, database_name)
-
-        total_processed += len(nodes_to_process)
+    # 所有新版本索引 ONLINE、本地文件导出后一次写入 manifest，查询侧的索引名、本地文件和查询向量维度同时切换
+    extra = {}
+    if swaps:
+        vector_indexes = load_manifest().get("vector_indexes", {})
+        for label, _, target in swaps:
+            vector_indexes[label] = {
+                "index": target["index"],
+                "property": target["property"],
+                "local_index": target["index"],
+                "dimensions": index_dim,
+            }
+        extra["vector_indexes"] = vector_indexes
+    save_manifest(
+        storage=EMBEDDING_STORAGE,
+        model=model_name,
+        source_dimensions=embedding_dim,
+        **extra,
+    )
+    for label, alias, target in swaps:
+        logger.info(f"Switched '{label}' vector index {alias['index']} -> {target['index']}")
 
-        drop_index(
-            driver=driver, database=database_name, index_name=f"{label}-embedding"
-        )
-        Neo4jDocumentStore(
-            url=NEO4J_URI,
-            database=NEO4J_DATABASE,
-            username=NEO4J_USER,
-            password=NEO4J_PASSWORD,
-            index=f"{label}-embedding",
-            node_label=label,
-            progress_bar=True,
-            embedding_dim=embedding_dim,
-        )
+    # 等待仍在使用旧索引名和旧文件的查询结束后再删除
+    if swaps:
+        time.sleep(INDEX_SWAP_GRACE_SECONDS)
+    for label, alias, _ in swaps:
+        retire_vector_index(driver, database_name, label, alias)
 
     logger.info(
-        f"\nFinished. Generated and wrote {total_processed} embeddings to the database."
+        f"\nFinished. Generated and wrote {total_processed} embeddings to the database, "
+        f"{total_skipped} unchanged nodes skipped."
     )
 
 
@@ -171,15 +598,16 @@ def main():
     embedding_base_url = os.getenv("EMBED_BASE_URL")
     driver = connect_to_database(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
     try:
-        nodes_by_label = fetch_all_nodes_by_label(driver, NEO4J_DATABASE)
         generate_and_write_embeddings(
-            nodes_by_label=nodes_by_label,
             label_to_properties=LABEL_TO_PROPERTIES_DICT,
             driver=driver,
             database_name=NEO4J_DATABASE,
             embedding_base_url=embedding_base_url,
             model_name=EMBEDDING_MODEL_NAME,
             batch_size=BATCH_SIZE,
+            max_concurrency=MAX_CONCURRENCY,
+            page_size=FETCH_PAGE_SIZE,
+            write_batch_size=WRITE_BATCH_SIZE,
         )
     finally:
         driver.close()
@@ -0,0 +1,133 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import json
+import argparse
+import numpy as np
+from typing import List, Optional
+from neo4j import Driver
+from loguru import logger
+from utils.drivers import get_driver
+from utils.embedding_storage import EmbeddingStorage, vector_index_alias
+from utils.utils import openai_embedding
+
+NEO4J_URI = "neo4j://localhost:7687"
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "12345678"
+NEO4J_DATABASE = "service-cim-2026-01-10"
+
+EMBEDDING_MODEL_NAME = "nvidia-llama-embed-nemotron-8b"
+DTYPES = ("float32", "float16", "int8")
+DIMENSIONS = (None, 2048, 1024, 512, 256)
+
+
+def fetch_vectors(driver: Driver, database: str, label: str) -> np.ndarray:
+    vector_property = vector_index_alias(label)["property"]
+    with driver.session(database=database) as session:
+        vectors = [
+            record["embedding"]
+            for record in session.run(
+                f"MATCH (n:`{label}`) WHERE n.`{vector_property}` IS NOT NULL "
+                f"RETURN n.`{vector_property}` AS embedding"
+            )
+        ]
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def top_k_indexes(matrix: np.ndarray, queries: np.ndarray, k: int, exclude: Optional[np.ndarray]):
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    scores = queries @ matrix.T
+    if exclude is not None:
+        # 用节点自身作查询时排除自己
+        scores[np.arange(len(queries)), exclude] = -np.inf
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    exclude: Optional[np.ndarray] = None,
+    dtypes=DTYPES,
+    dimensions=DIMENSIONS,
+) -> List[dict]:
+    """
+    以当前存储的完整 float32 向量的 top-k 为基准，计算各种截断维度和精度下的 recall@k 与大小。
+    """
+    full_dimensions = vectors.shape[1]
+    truth = top_k_indexes(vectors, queries, k, exclude)
+    rows = []
+    for dims in dimensions:
+        if dims is not None and dims >= full_dimensions:
+            continue
+        for dtype in dtypes:
+            storage = EmbeddingStorage(dtype=dtype, dimensions=dims)
+            stored = EmbeddingStorage.decode(storage.encode(vectors))
+            found = top_k_indexes(stored, storage.truncate(queries), k, exclude)
+            recall = np.mean(
+                [len(set(t) & set(f)) / len(t) for t, f in zip(truth, found)]
+            )
+            bytes_per_vector = storage.bytes_per_vector(full_dimensions)
+            rows.append(
+                {
+                    "dtype": dtype,
+                    "dimensions": dims or full_dimensions,
+                    f"recall@{k}": round(float(recall), 4),
+                    "bytes_per_vector": bytes_per_vector,
+                    "total_mb": round(bytes_per_vector * len(vectors) / 2**20, 2),
+                }
+            )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较不同向量存储方式的召回率和大小")
+    parser.add_argument("--label", default="OutputEntity")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="用节点自身作查询时的采样数量")
+    parser.add_argument("--questions", help="每行一个问题的文本文件，用真实问题作查询")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    driver = get_driver(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
+    vectors = fetch_vectors(driver, NEO4J_DATABASE, args.label)
+    logger.info(f"Loaded {len(vectors)} '{args.label}' vectors of {vectors.shape[1]} dims")
+
+    if args.questions:
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        queries = np.asarray(
+            [
+                openai_embedding(
+                    embedding_base_url=os.getenv("EMBED_BASE_URL"),
+                    model=EMBEDDING_MODEL_NAME,
+                    text=question,
+                )
+                for question in questions
+            ],
+            dtype=np.float32,
+        )
+        exclude = None
+    else:
+        rng = np.random.default_rng(0)
+        exclude = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+        queries = vectors[exclude]
+
+    rows = recall_report(vectors, queries[:, : vectors.shape[1]], k=args.k, exclude=exclude)
+    recall_key = f"recall@{args.k}"
+    print(f"\n{'dtype':<8} {'dims':>6} {recall_key:>10} {'bytes/vec':>10} {'total MB':>10}")
+    for row in rows:
+        print(
+            f"{row['dtype']:<8} {row['dimensions']:>6} {row[recall_key]:>10.4f} "
+            f"{row['bytes_per_vector']:>10} {row['total_mb']:>10.2f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+from utils.drivers import get_driver
+from utils.graph_repository import export_snapshot
+from utils.embedding_storage import load_embedding_storage
+
+NEO4J_URI = "neo4j://localhost:7687"
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "12345678"
+NEO4J_DATABASE = "service-cim-2026-01-10"
+
+DEFAULT_SNAPSHOT_PATH = "./.cache/graph_snapshot.npz"
+
+
+def main():
+    path = os.getenv("GRAPH_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+    driver = get_driver(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
+    export_snapshot(
+        driver=driver,
+        database=NEO4J_DATABASE,
+        path=path,
+        storage=load_embedding_storage(),
+    )
+
+
+if __name__ == "__main__":
+    main()
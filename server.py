@@ -0,0 +1,60 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import json
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
+
+from agent import build_agent_system
+from utils.drivers import close_async_drivers
+
+
+class Question(BaseModel):
+    question: str
+    max_step: int = 10
+
+
+class Answer(BaseModel):
+    answer: str
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 所有请求共用一个 AgentSystem，每个问题的 Agent 由 AgentSystem 单独创建
+    app.state.agent_system = build_agent_system()
+    yield
+    await close_async_drivers()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/ask", response_model=Answer)
+async def ask(body: Question) -> Answer:
+    answer = await app.state.agent_system.aresponse(
+        question=body.question, max_step=body.max_step
+    )
+    return Answer(answer=answer)
+
+
+@app.post("/ask/stream")
+async def ask_stream(body: Question) -> StreamingResponse:
+    async def event_stream():
+        async for event in app.state.agent_system.astream_response(
+            question=body.question, max_step=body.max_step
+        ):
+            yield f"event: {event.type}\ndata: {json.dumps(event.to_dict(), ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        app,
+        host=os.getenv("SERVER_HOST", "0.0.0.0"),
+        port=int(os.getenv("SERVER_PORT", "8000")),
+    )
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# 测试使用临时的向量缓存和 manifest，不读写仓库下的 .cache
+_cache_dir = tempfile.mkdtemp(prefix="ainvoker-tests-")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_cache_dir, "embeddings.sqlite3")
+os.environ["EMBEDDING_MANIFEST_PATH"] = os.path.join(
+    _cache_dir, "embedding_manifest.json"
+)
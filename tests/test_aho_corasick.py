@@ -0,0 +1,55 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import random
+
+from utils.aho_corasick import AhoCorasick, longest_matches
+
+
+def _brute_force(patterns, text):
+    return sorted(
+        (start, start + len(pattern), value)
+        for pattern, value in patterns
+        for start in range(len(text) - len(pattern) + 1)
+        if text.startswith(pattern, start)
+    )
+
+
+def test_find_all_overlapping_patterns():
+    patterns = [("he", 1), ("she", 2), ("his", 3), ("hers", 4)]
+    automaton = AhoCorasick()
+    for pattern, value in patterns:
+        automaton.add(pattern, value)
+
+    assert sorted(automaton.find_all("ushers")) == [(1, 4, 2), (2, 4, 1), (2, 6, 4)]
+
+
+def test_find_all_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(50):
+        patterns = [
+            ("".join(rng.choice("ab发电") for _ in range(rng.randint(1, 4))), i)
+            for i in range(rng.randint(1, 8))
+        ]
+        text = "".join(rng.choice("ab发电量") for _ in range(rng.randint(0, 40)))
+        automaton = AhoCorasick()
+        for pattern, value in patterns:
+            automaton.add(pattern, value)
+        assert sorted(automaton.find_all(text)) == _brute_force(patterns, text)
+
+
+def test_add_after_build_rebuilds():
+    automaton = AhoCorasick()
+    automaton.add("发电量", "a")
+    assert automaton.build().find_all("查询发电量") == [(2, 5, "a")]
+    automaton.add("查询", "b")
+    assert sorted(automaton.find_all("查询发电量")) == [(0, 2, "b"), (2, 5, "a")]
+    # 空模式被忽略
+    automaton.add("", "c")
+    assert len(automaton.find_all("查询发电量")) == 2
+
+
+def test_longest_matches_drops_covered_matches():
+    matches = [(0, 3, "a"), (0, 5, "b"), (0, 5, "c"), (4, 6, "d")]
+    assert longest_matches(matches) == [(0, 5, "b"), (0, 5, "c"), (4, 6, "d")]
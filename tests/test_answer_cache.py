@@ -0,0 +1,125 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import json
+import pytest
+
+from agent_system import AgentSystem, SemanticAnswerCache
+from benchmark.fakes import FakeEmbeddingServer, ScriptedModel
+from utils.graph_repository import GraphRepository
+
+CACHED_QUESTION = "查询今天的发电量"
+# 与 CACHED_QUESTION 的假向量余弦相似度约 0.93
+SIMILAR_QUESTION = "查询今天的发电量？"
+OTHER_QUESTION = "统计本月的用电负荷"
+
+INTERFACE = {
+    "id": "i1",
+    "name": "发电量查询",
+    "llm_description": "按日期查询发电量",
+    "llm_function_description": "查询发电量",
+}
+
+
+class _Repository(GraphRepository):
+    def get_interfaces(self, interface_ids):
+        return [INTERFACE] if INTERFACE["id"] in interface_ids else []
+
+    def search_similar_nodes(self, label, embedding, top_k):
+        return []
+
+    def search_output_entities_with_interfaces(self, embedding, top_k):
+        return []
+
+    def list_interfaces(self):
+        return []
+
+    def list_output_entities_with_interfaces(self):
+        return []
+
+
+class _Script:
+    # 记录每次调用时的用户消息，返回固定输出
+    def __init__(self, output):
+        self.output = output
+        self.inputs = []
+
+    def __call__(self, messages):
+        user_message = [m for m in messages if m.role == "user"][-1]
+        self.inputs.append(user_message.content)
+        return self.output
+
+
+@pytest.fixture
+def embedding_server():
+    server = FakeEmbeddingServer(latency=0).start()
+    yield server
+    server.stop()
+
+
+def _agent_system(embedding_server, mode):
+    search = _Script(
+        {
+            "content": json.dumps(
+                {"interface_ids": [INTERFACE["id"]], "requied_entities": ["日期"]}
+            )
+        }
+    )
+    summarize = _Script({"content": "调用发电量查询接口"})
+    agent_system = AgentSystem(
+        search_model=ScriptedModel(script=search, latency=0, token_latency=0),
+        summarize_model=ScriptedModel(script=summarize, latency=0, token_latency=0),
+        embedding_base_url=embedding_server.base_url,
+        answer_cache=SemanticAnswerCache(threshold=0.9, mode=mode),
+        repository=_Repository(),
+        exact_match=False,
+        prefetch=False,
+        prefetch_cim_classes=False,
+    )
+    return agent_system, search, summarize
+
+
+def test_interfaces_cache_hit_summarizes_new_question(embedding_server):
+    agent_system, search, summarize = _agent_system(embedding_server, "interfaces")
+    first = list(agent_system.stream_response(CACHED_QUESTION, max_step=1))
+    assert first[-1].data == {"content": "调用发电量查询接口", "cached": False}
+    searches = len(search.inputs)
+
+    events = list(agent_system.stream_response(SIMILAR_QUESTION, max_step=1))
+
+    assert len(search.inputs) == searches
+    assert [event.type for event in events if event.type != "summary_token"] == [
+        "answer"
+    ]
+    assert events[-1].data["cached"] is False
+    summarizer_input = json.loads(summarize.inputs[-1])
+    assert summarizer_input["origin_question"] == SIMILAR_QUESTION
+    assert [c["id"] for c in summarizer_input["candidate_interfaces"]] == ["i1"]
+    # 缓存的条目不被修改
+    (entry,) = agent_system.answer_cache._entries
+    assert entry.world_state.origin_question == CACHED_QUESTION
+
+
+def test_answer_cache_hit_skips_agents(embedding_server):
+    agent_system, search, summarize = _agent_system(embedding_server, "answer")
+    agent_system.response(CACHED_QUESTION, max_step=1)
+    calls = len(search.inputs), len(summarize.inputs)
+
+    events = list(agent_system.stream_response(SIMILAR_QUESTION, max_step=1))
+
+    assert [event.type for event in events] == ["answer"]
+    assert events[-1].data == {"content": "调用发电量查询接口", "cached": True}
+    assert (len(search.inputs), len(summarize.inputs)) == calls
+
+
+def test_cache_miss_searches_again(embedding_server):
+    agent_system, search, _ = _agent_system(embedding_server, "answer")
+    agent_system.response(CACHED_QUESTION, max_step=1)
+    searches = len(search.inputs)
+
+    answer = agent_system.response(OTHER_QUESTION, max_step=1)
+
+    assert answer == "调用发电量查询接口"
+    assert len(search.inputs) > searches
+    assert len(agent_system.answer_cache._entries) == 2
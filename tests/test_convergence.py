@@ -0,0 +1,79 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+from agent_system.convergence import (
+    AllSeenPolicy,
+    AnyPolicy,
+    BudgetPolicy,
+    JaccardStabilityPolicy,
+    NoNewEntitiesPolicy,
+    StepRecord,
+    default_policy,
+)
+
+
+def _records(*steps, elapsed=0.0, total_tokens=0):
+    return [
+        StepRecord(
+            step=i,
+            interface_ids=interface_ids,
+            required_entities=required_entities,
+            elapsed=elapsed,
+            total_tokens=total_tokens,
+        )
+        for i, (interface_ids, required_entities) in enumerate(steps, 1)
+    ]
+
+
+def test_all_seen_stops_when_no_new_interfaces():
+    policy = AllSeenPolicy()
+    assert not policy.should_stop(_records((["a"], [])))[0]
+    assert not policy.should_stop(_records((["a"], []), (["a", "b"], [])))[0]
+    assert policy.should_stop(_records((["a", "b"], []), (["b"], [])))[0]
+    # 空结果不算收敛
+    assert not policy.should_stop(_records((["a"], []), ([], [])))[0]
+
+
+def test_jaccard_stability_respects_threshold_and_patience():
+    policy = JaccardStabilityPolicy(threshold=0.5)
+    assert not policy.should_stop(_records((["a", "b"], [])))[0]
+    assert policy.should_stop(_records((["a", "b"], []), (["a", "b", "c"], [])))[0]
+    assert not policy.should_stop(_records((["a", "b"], []), (["c", "d"], [])))[0]
+
+    patient = JaccardStabilityPolicy(threshold=1.0, patience=2)
+    stable_once = _records((["a"], []), (["b"], []), (["b"], []))
+    stable_twice = _records((["b"], []), (["b"], []), (["b"], []))
+    assert not patient.should_stop(stable_once)[0]
+    assert patient.should_stop(stable_twice)[0]
+
+
+def test_no_new_entities():
+    policy = NoNewEntitiesPolicy()
+    assert not policy.should_stop(_records(([], ["日期"])))[0]
+    assert not policy.should_stop(_records(([], ["日期"]), ([], ["厂站"])))[0]
+    assert policy.should_stop(_records(([], ["日期", "厂站"]), ([], ["厂站"])))[0]
+
+
+def test_budget():
+    policy = BudgetPolicy(max_seconds=10, max_tokens=1000)
+    assert not policy.should_stop(_records(([], []), elapsed=1, total_tokens=10))[0]
+    assert policy.should_stop(_records(([], []), elapsed=10, total_tokens=10))[0]
+    assert policy.should_stop(_records(([], []), elapsed=1, total_tokens=1000))[0]
+    assert not BudgetPolicy().should_stop(
+        _records(([], []), elapsed=1e9, total_tokens=10**9)
+    )[0]
+
+
+def test_any_policy_returns_first_stop_reason():
+    policy = AnyPolicy(NoNewEntitiesPolicy(), BudgetPolicy(max_tokens=100))
+    stop, reason = policy.should_stop(_records((["a"], ["日期"]), total_tokens=100))
+    assert stop and "token budget" in reason
+    stop, reason = policy.should_stop(_records((["a"], ["日期"]), total_tokens=1))
+    assert not stop and reason == "first step; within budget"
+
+
+def test_default_policy_stops_on_repeated_candidates():
+    policy = default_policy()
+    assert not policy.should_stop(_records((["a", "b"], [])))[0]
+    assert policy.should_stop(_records((["a", "b"], []), (["a", "b"], [])))[0]
@@ -0,0 +1,67 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import importlib.util
+
+from utils.tokens import estimate_tokens
+
+# 脚本文件名带连字符，不能直接 import
+_spec = importlib.util.spec_from_file_location(
+    "embed_service_list", os.path.join("embed", "embed_service-list.py")
+)
+embed_service_list = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(embed_service_list)
+
+
+def _items(texts):
+    return [(f"n{i}", text, f"f{i}") for i, text in enumerate(texts)]
+
+
+def test_make_batches_respects_size_and_token_limits():
+    texts = ["发电量" * n for n in (1, 30, 2, 10, 5, 20, 3, 8)]
+    batches = embed_service_list.make_batches(
+        _items(texts), max_batch_size=3, max_batch_tokens=40
+    )
+
+    assert sorted(item for batch in batches for item in batch) == sorted(_items(texts))
+    for batch in batches:
+        assert len(batch) <= 3
+        if len(batch) > 1:
+            assert sum(estimate_tokens(item[1]) for item in batch) <= 40
+
+
+def test_make_batches_groups_similar_lengths():
+    texts = ["a" * 400, "b", "c" * 404, "d" * 2, "e" * 3, "f" * 396]
+    batches = embed_service_list.make_batches(
+        _items(texts), max_batch_size=3, max_batch_tokens=10**6
+    )
+    assert [[item[1][0] for item in batch] for batch in batches] == [
+        ["b", "d", "e"],
+        ["f", "a", "c"],
+    ]
+
+
+def test_make_batches_keeps_oversized_item_alone():
+    texts = ["短", "发电量" * 100, "长度"]
+    batches = embed_service_list.make_batches(
+        _items(texts), max_batch_size=10, max_batch_tokens=50
+    )
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert embed_service_list.make_batches([], max_batch_size=3, max_batch_tokens=10) == []
+
+
+def test_embedding_fingerprint_changes_with_text_model_and_dimensions():
+    storage = embed_service_list.EmbeddingStorage()
+    fingerprint = embed_service_list.embedding_fingerprint("发电量", "m1", storage)
+
+    assert fingerprint == embed_service_list.embedding_fingerprint("发电量", "m1", storage)
+    assert fingerprint != embed_service_list.embedding_fingerprint("发电量 ", "m1", storage)
+    assert fingerprint != embed_service_list.embedding_fingerprint("发电量", "m2", storage)
+    assert fingerprint != embed_service_list.embedding_fingerprint(
+        "发电量", "m1", embed_service_list.EmbeddingStorage(dimensions=1024)
+    )
+    # 精度只影响本地文件，不需要重新嵌入
+    assert fingerprint == embed_service_list.embedding_fingerprint(
+        "发电量", "m1", embed_service_list.EmbeddingStorage(dtype="int8")
+    )
@@ -0,0 +1,93 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pytest
+
+from utils.embedding_storage import (
+    EmbeddingStorage,
+    current_embedding_storage,
+    load_embedding_storage,
+    save_manifest,
+    update_vector_index_alias,
+    vector_index_alias,
+)
+
+
+def _unit_rows(n, dim, seed=0):
+    matrix = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def test_truncate_renormalizes_prefix():
+    matrix = _unit_rows(4, 16)
+    truncated = EmbeddingStorage(dimensions=8).truncate(matrix)
+
+    assert truncated.shape == (4, 8)
+    np.testing.assert_allclose(np.linalg.norm(truncated, axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_allclose(
+        truncated[0] * np.linalg.norm(matrix[0, :8]), matrix[0, :8], rtol=1e-5
+    )
+    # 不截断或维度已足够小时原样返回
+    assert EmbeddingStorage().truncate(matrix).shape == (4, 16)
+    assert EmbeddingStorage(dimensions=32).truncate(matrix).shape == (4, 16)
+
+
+def test_prepare_query_matches_stored_dimensions():
+    query = _unit_rows(1, 16)[0].tolist()
+    assert EmbeddingStorage().prepare_query(query) is query
+    assert len(EmbeddingStorage(dimensions=8).prepare_query(query)) == 8
+
+
+@pytest.mark.parametrize("dtype, itemsize", [("float32", 4), ("float16", 2), ("int8", 1)])
+def test_encode_dtype_and_size(dtype, itemsize):
+    storage = EmbeddingStorage(dtype=dtype, dimensions=8)
+    encoded = storage.encode(_unit_rows(4, 16))
+
+    assert encoded.dtype == np.dtype(dtype)
+    assert encoded.shape == (4, 8)
+    assert storage.bytes_per_vector(16) == 8 * itemsize
+    assert EmbeddingStorage(dtype=dtype).bytes_per_vector(16) == 16 * itemsize
+
+
+def test_int8_preserves_cosine_ranking():
+    matrix = _unit_rows(50, 64)
+    query = matrix[7]
+    exact = matrix @ query
+    decoded = EmbeddingStorage.decode(EmbeddingStorage(dtype="int8").encode(matrix))
+    decoded /= np.linalg.norm(decoded, axis=1, keepdims=True)
+    approx = decoded @ query
+
+    assert int(np.argmax(approx)) == 7
+    np.testing.assert_allclose(approx, exact, atol=0.02)
+    assert np.abs(EmbeddingStorage(dtype="int8").encode(matrix)).max() == 127
+
+
+def test_rejects_unknown_dtype():
+    with pytest.raises(ValueError):
+        EmbeddingStorage(dtype="bfloat16")
+
+
+def test_manifest_round_trip_and_alias(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    assert load_embedding_storage(path) == EmbeddingStorage()
+    assert vector_index_alias("Interface", path) == {
+        "index": "Interface-embedding",
+        "property": "embedding",
+        "local_index": "Interface",
+    }
+
+    storage = EmbeddingStorage(dtype="float16", dimensions=1024)
+    save_manifest(storage, model="m", path=path)
+    update_vector_index_alias(
+        "Interface", path=path, index="Interface-embedding-v2", property="embedding_v2"
+    )
+
+    assert load_embedding_storage(path) == storage
+    assert current_embedding_storage(path) == storage
+    assert vector_index_alias("Interface", path) == {
+        "index": "Interface-embedding-v2",
+        "property": "embedding_v2",
+        "local_index": "Interface",
+    }
@@ -0,0 +1,108 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import pytest
+
+from benchmark.fakes import FakeEmbeddingServer
+from tools.service import ServiceTools
+from utils.embedding_cache import EmbeddingCache
+from utils.graph_repository import GraphRepository
+
+INTERFACES = [
+    {"id": "i1", "name": "发电量查询", "standard_name": "", "code": "API0001"},
+    {"id": "i2", "name": "负荷查询", "standard_name": "", "code": "API0002"},
+]
+RECORDS = [
+    {
+        "entity_id": "e1",
+        "entity_name": "日发电量",
+        "entity_description": "每日发电量",
+        "interface_id": "i1",
+        "interface_name": "发电量查询",
+        "interface_description": "查询发电量",
+        "interface_standard_name": "",
+        "interface_code": "API0001",
+    },
+    {
+        "entity_id": "e2",
+        "entity_name": "月用电负荷",
+        "entity_description": "每月用电负荷",
+        "interface_id": "i2",
+        "interface_name": "负荷查询",
+        "interface_description": "查询负荷",
+        "interface_standard_name": "",
+        "interface_code": "API0002",
+    },
+]
+
+
+class _Repository(GraphRepository):
+    def __init__(self):
+        self.vector_searches = 0
+
+    def get_interfaces(self, interface_ids):
+        return []
+
+    def search_similar_nodes(self, label, embedding, top_k):
+        return []
+
+    def search_output_entities_with_interfaces(self, embedding, top_k):
+        # 向量检索把 e2 排在 e1 前面
+        self.vector_searches += 1
+        return [RECORDS[1], RECORDS[0]][:top_k]
+
+    def list_interfaces(self):
+        return INTERFACES
+
+    def list_output_entities_with_interfaces(self):
+        return RECORDS
+
+
+@pytest.fixture
+def embedding_server():
+    server = FakeEmbeddingServer(latency=0).start()
+    yield server
+    server.stop()
+
+
+def _service_tools(embedding_server, repository, hybrid_search, embedding_cache=None):
+    return ServiceTools(
+        embedding_base_url=embedding_server.base_url,
+        embedding_model="fake",
+        embedding_cache=embedding_cache or EmbeddingCache(path=None),
+        repository=repository,
+        hybrid_search=hybrid_search,
+    )
+
+
+def test_exact_match_skips_embedding(embedding_server):
+    repository = _Repository()
+    service_tools = _service_tools(embedding_server, repository, hybrid_search=True)
+
+    hits = service_tools.output_entity_hits("api0001")
+
+    assert hits[0]["相关接口id"] == "i1"
+    assert embedding_server.requests == 0
+    assert repository.vector_searches == 0
+
+
+def test_hybrid_search_fuses_lexical_and_vector_rankings(embedding_server):
+    repository = _Repository()
+    embedding_cache = EmbeddingCache(path=None)
+    vector_only = _service_tools(
+        embedding_server, repository, False, embedding_cache=embedding_cache
+    )
+    hybrid = _service_tools(
+        embedding_server, repository, True, embedding_cache=embedding_cache
+    )
+
+    assert [hit["实体id"] for hit in vector_only.output_entity_hits("日发电量统计")] == [
+        "e2",
+        "e1",
+    ]
+    # e1 在词法结果中排第一，融合后超过只在向量结果中排第一的 e2
+    assert hybrid.output_entity_hits("日发电量统计")[0]["实体id"] == "e1"
+    # 两次检索共用缓存的查询向量
+    assert embedding_server.requests == 1
+    assert repository.vector_searches == 2
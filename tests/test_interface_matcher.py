@@ -0,0 +1,60 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+from agent_system.actions import InterfaceMatcher
+from utils.graph_repository import GraphRepository
+
+INTERFACES = [
+    {"id": "i1", "name": "发电量查询", "standard_name": "", "code": "API0001"},
+    {"id": "i2", "name": "发电量查询明细", "standard_name": "", "code": "API0002"},
+    {"id": "i3", "name": "负荷", "standard_name": "", "code": "API0003"},
+]
+
+
+class _Repository(GraphRepository):
+    def __init__(self):
+        self.interfaces = INTERFACES
+        self.current_version = 1
+
+    def get_interfaces(self, interface_ids):
+        return []
+
+    def search_similar_nodes(self, label, embedding, top_k):
+        return []
+
+    def search_output_entities_with_interfaces(self, embedding, top_k):
+        return []
+
+    def list_interfaces(self):
+        return self.interfaces
+
+    def list_output_entities_with_interfaces(self):
+        return []
+
+    def version(self):
+        return self.current_version
+
+
+def test_match_prefers_longest_name_in_question_order():
+    matcher = InterfaceMatcher(repository=_Repository())
+    assert matcher.match("先调用API0003，再用发电量查询明细") == ["i3", "i2"]
+    # 短于 min_length 的名称不参与匹配
+    assert matcher.match("查询负荷") == []
+
+
+def test_match_ignores_codes_inside_longer_words():
+    matcher = InterfaceMatcher(repository=_Repository())
+    assert matcher.match("XAPI0001") == []
+    assert matcher.match("api0001 的参数") == ["i1"]
+
+
+def test_rebuilds_when_version_changes():
+    repository = _Repository()
+    matcher = InterfaceMatcher(repository=repository, check_interval=0)
+    repository.interfaces = INTERFACES + [
+        {"id": "i4", "name": "用电负荷预测", "standard_name": "", "code": ""}
+    ]
+    assert matcher.match("用电负荷预测") == []
+    repository.current_version = 2
+    assert matcher.match("用电负荷预测") == ["i4"]
@@ -0,0 +1,43 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+from utils.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def _record(entity_id, interface_id="i1"):
+    return {"entity_id": entity_id, "interface_id": interface_id}
+
+
+def test_tokenize_keeps_codes_and_splits_chinese():
+    assert tokenize("API0001 发电量") == ["api0001", "发", "电", "量", "发电", "电量"]
+
+
+def test_bm25_ranks_matching_and_shorter_documents_first():
+    index = BM25Index()
+    for text in ("发电量查询", "负荷预测", "API0001 发电量"):
+        index.add(text)
+    index.build()
+
+    assert [doc for doc, _ in index.search("发电量", top_k=3)] == [2, 0]
+    assert [doc for doc, _ in index.search("api0001", top_k=3)] == [2]
+    assert index.search("不存在", top_k=3) == []
+    assert len(index.search("电", top_k=1)) == 1
+
+
+def test_reciprocal_rank_fusion_ordering():
+    a, b, c, d = (_record(entity_id) for entity_id in "abcd")
+    fused = reciprocal_rank_fusion([[a, b, c], [c, a, d]], top_k=4)
+    # a: 1/61 + 1/62, c: 1/63 + 1/61, b: 1/62, d: 1/63
+    assert [record["entity_id"] for record in fused] == ["a", "c", "b", "d"]
+    assert len(reciprocal_rank_fusion([[a, b, c], [c, a, d]], top_k=2)) == 2
+
+
+def test_reciprocal_rank_fusion_keys_interface_records_by_interface_id():
+    entity = _record("e1", "i1")
+    interface = _record(None, "i1")
+    other_interface = _record(None, "i2")
+    fused = reciprocal_rank_fusion(
+        [[interface, entity], [other_interface, interface]], top_k=3
+    )
+    assert fused == [interface, other_interface, entity]
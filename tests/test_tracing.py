@@ -0,0 +1,89 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import json
+import asyncio
+
+from utils.tracing import Tracer, _current_span
+
+
+def _events(tracer, seen):
+    # 模拟 stream_response：生成器内部的 span 跨越 yield
+    with tracer.span("inner"):
+        for i in range(3):
+            seen.append(_current_span.get().name)
+            yield i
+
+
+async def _aevents(tracer, seen):
+    with tracer.span("inner"):
+        for i in range(3):
+            seen.append(_current_span.get().name)
+            yield i
+
+
+def test_iter_span_does_not_leak_to_consumer():
+    tracer = Tracer()
+    spans = []
+    tracer.add_listener(spans.append)
+    seen = []
+
+    consumer = []
+    for _ in tracer.iter_span("question", _events(tracer, seen)):
+        consumer.append(_current_span.get())
+        with tracer.span("consumer"):
+            pass
+
+    assert consumer == [None, None, None]
+    # 生成器内部每次恢复时仍在自己的 span 中
+    assert seen == ["inner", "inner", "inner"]
+    by_name = {span.name: span for span in spans}
+    assert by_name["inner"].parent_id == by_name["question"].span_id
+    assert all(
+        span.parent_id is None for span in spans if span.name == "consumer"
+    )
+
+
+def test_iter_span_closes_inner_spans_when_consumer_stops():
+    tracer = Tracer()
+    spans = []
+    tracer.add_listener(spans.append)
+
+    events = tracer.iter_span("question", _events(tracer, []))
+    next(events)
+    events.close()
+
+    assert [span.name for span in spans] == ["inner", "question"]
+    assert _current_span.get() is None
+
+
+def test_aiter_span_does_not_leak_to_consumer():
+    tracer = Tracer()
+    spans = []
+    tracer.add_listener(spans.append)
+    seen = []
+
+    async def consume():
+        consumer = []
+        async for _ in tracer.aiter_span("question", _aevents(tracer, seen)):
+            consumer.append(_current_span.get())
+        return consumer
+
+    assert asyncio.run(consume()) == [None, None, None]
+    assert seen == ["inner", "inner", "inner"]
+    by_name = {span.name: span for span in spans}
+    assert by_name["inner"].parent_id == by_name["question"].span_id
+
+
+def test_spans_written_to_jsonl_in_background(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(path=str(path))
+    with tracer.span("outer", question_chars=3):
+        with tracer.span("inner"):
+            pass
+    tracer.flush()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["name"] for line in lines] == ["inner", "outer"]
+    assert lines[0]["parentSpanId"] == lines[1]["spanId"]
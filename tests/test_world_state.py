@@ -0,0 +1,80 @@
+import sys, os
+
+sys.path.append(os.getcwd())
+
+import json
+
+from agent_system.world_state import WorldState
+from utils.tokens import estimate_tokens
+
+
+def _world_state(n_interfaces=20, n_cim_classes=10):
+    interface_history = [
+        {
+            "id": f"i{i}",
+            "name": f"接口{i}",
+            "description": "按日期和厂站查询发电量、上网电量和厂用电量的详细数据。" * 5,
+            "function_description": "查询发电量",
+        }
+        for i in range(n_interfaces)
+    ]
+    cim_classes = {
+        "发电量": [
+            {
+                "name": f"CIM类{i}",
+                "description": "描述发电机组在统计周期内的发电量。",
+                "attributes": ["属性说明" * 20 for _ in range(5)],
+            }
+            for i in range(n_cim_classes)
+        ]
+    }
+    return WorldState(
+        origin_question="查询昨天各厂站的发电量",
+        interface_history=interface_history,
+        required_entities=["日期", "厂站"],
+        cim_classes=cim_classes,
+    )
+
+
+def test_render_without_budget_is_repr():
+    world_state = _world_state()
+    assert world_state.render() == repr(world_state)
+
+
+def test_render_keeps_full_state_within_budget():
+    world_state = _world_state(n_interfaces=2, n_cim_classes=1)
+    rendered = world_state.render(token_budget=100000)
+    context = json.loads(rendered)
+    assert context["candidate_interfaces"][0]["description"]
+    assert context["cim_classes"]["发电量"][0]["attributes"]
+
+
+def test_render_compresses_to_token_budget():
+    world_state = _world_state()
+    full_tokens = estimate_tokens(world_state.render(token_budget=100000))
+    for token_budget in (full_tokens // 2, full_tokens // 4, full_tokens // 8):
+        rendered = world_state.render(token_budget=token_budget)
+        assert estimate_tokens(rendered) <= token_budget
+        context = json.loads(rendered)
+        # 压缩只去掉描述，不丢候选接口和问题
+        assert context["origin_question"] == world_state.origin_question
+        assert [c["id"] for c in context["candidate_interfaces"]] == [
+            i["id"] for i in world_state.interface_history
+        ]
+
+
+def test_render_compresses_cim_classes_before_candidates():
+    world_state = _world_state()
+    full = world_state.render(token_budget=100000)
+    without_attributes = json.loads(full)
+    without_attributes["cim_classes"] = {
+        query: [{"name": c["name"], "description": c["description"]} for c in hits]
+        for query, hits in world_state.cim_classes.items()
+    }
+    token_budget = estimate_tokens(
+        json.dumps(without_attributes, ensure_ascii=False, separators=(",", ":"))
+    )
+
+    context = json.loads(world_state.render(token_budget=token_budget))
+    assert "attributes" not in context["cim_classes"]["发电量"][0]
+    assert context["candidate_interfaces"][0]["description"]
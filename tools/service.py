@@ -1,86 +1,187 @@
-import os, sys, json
+import os, sys, json, asyncio, functools
 
 sys.path.append(os.getcwd())
 
-from typing import List, Dict, Union, Any, Literal
+from typing import List, Dict, Union, Any, Literal, Optional
 from cn2an import an2cn
 
 from agno.tools import Toolkit
-from neo4j import GraphDatabase
 from haystack import Document
-from neo4j_haystack.document_stores import Neo4jDocumentStore
-from utils.utils import openai_embedding, get_properties, get_property
+from utils.utils import get_properties, get_property
+from utils.embedding_batcher import get_embedding_batcher
+from utils.embedding_cache import EmbeddingCache, get_embedding_cache
+from utils.embedding_storage import EmbeddingStorage, current_embedding_storage
+from utils.graph_repository import GraphRepository, Neo4jGraphRepository
+from utils.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from utils.vector_index import DEFAULT_INDEX_DIR
+from utils.tracing import span
 from loguru import logger
 
 
 class ServiceTools(Toolkit):
     def __init__(
         self,
-        uri: str,
-        user: str,
-        password: str,
-        database: str,
+        uri: Optional[str] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        database: Optional[str] = None,
+        *,
         embedding_base_url: str,
         embedding_model: str,
         enable_search_similar_cim_classes: bool = False,
         enable_search_similar_output_entities: bool = False,
         all: bool = False,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        use_local_vector_index: bool = False,
+        vector_index_dir: str = DEFAULT_INDEX_DIR,
+        async_tools: bool = False,
+        repository: Optional[GraphRepository] = None,
+        hybrid_search: bool = False,
+        embedding_storage: Optional[EmbeddingStorage] = None,
         **kwargs,
     ):
         self.embedding_base_url = embedding_base_url
         self.embedding_model = embedding_model
-        self.document_store = None
-
-        self.uri = uri or os.getenv("NEO4J_URI", "bolt://localhost:7687")
-        self.user = user or os.getenv("NEO4J_USERNAME")
-        self.password = password or os.getenv("NEO4J_PASSWORD")
-        self.database = database or "neo4j"
-        if self.user is None or self.password is None:
-            raise ValueError("Username or password for Neo4j not provided")
-
-        try:
-            self.driver = GraphDatabase.driver(
-                self.uri, auth=(self.user, self.password)
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        self.embedding_batcher = get_embedding_batcher(
+            base_url=embedding_base_url, model=embedding_model
+        )
+        # 未指定时跟随嵌入脚本写入的 manifest，查询向量按同样方式截断
+        self._embedding_storage = embedding_storage
+
+        # 连接参数只在没有传入 repository 时用于创建 Neo4jGraphRepository
+        if repository is None:
+            user = user or os.getenv("NEO4J_USERNAME")
+            password = password or os.getenv("NEO4J_PASSWORD")
+            if user is None or password is None:
+                raise ValueError("Username or password for Neo4j not provided")
+            repository = Neo4jGraphRepository(
+                uri=uri or os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+                user=user,
+                password=password,
+                database=database or "neo4j",
+                use_local_vector_index=use_local_vector_index,
+                vector_index_dir=vector_index_dir,
             )
-            self.driver.verify_connectivity()
-            logger.debug("Connected to Neo4j database")
-        except Exception as e:
-            logger.error(f"Failed to connect to Neo4j: {e}")
-            raise
+        self.repository = repository
+        # 业务实体检索同时使用 BM25 词法索引，与向量结果做 reciprocal rank fusion
+        self.hybrid_search = hybrid_search
 
         tools: List[Any] = []
         if all or enable_search_similar_output_entities:
             tools.append(self.search_similar_output_entities)
         if all or enable_search_similar_cim_classes:
             tools.append(self.search_similar_cim_classes)
+        if async_tools:
+            tools = [self._to_async_tool(tool) for tool in tools]
         super().__init__(name="service_tools", tools=tools, **kwargs)
 
+    @staticmethod
+    def _to_async_tool(tool):
+        # 供 Agent.arun 使用：工具在线程中执行，不阻塞事件循环，同一轮的多个工具调用可以并发
+        @functools.wraps(tool)
+        async def async_tool(*args, **kwargs):
+            return await asyncio.to_thread(tool, *args, **kwargs)
+
+        return async_tool
+
     def _search_similar_nodes(
         self,
         text: str,
         node_label: str,
         top_k,
     ) -> List[Document]:
-        if self.document_store is None:
-            self.document_store = Neo4jDocumentStore(
-                url=self.uri,
-                database=self.database,
-                username=self.user,
-                password=self.password,
-                embedding_dim=4096,
-            )
+        return self.repository.search_similar_nodes(
+            label=node_label, embedding=self._embed_search_query(text), top_k=top_k
+        )
 
-        entity_embedding = openai_embedding(
-            embedding_base_url=self.embedding_base_url,
-            text=text,
+    def _embed_query(self, text: str) -> List[float]:
+        # 同一轮中并发的工具调用经 batcher 合并为一次 embeddings.create
+        embedding = self.embedding_cache.get_or_compute(
             model=self.embedding_model,
+            text=text,
+            compute=self.embedding_batcher.embed,
         )
-        self.document_store.node_label = node_label
-        self.document_store.index = f"{node_label}-embedding"
-        documents = self.document_store.query_by_embedding(
-            query_embedding=entity_embedding, top_k=top_k
+        self.embedding_cache.log_stats()
+        return embedding
+
+    @property
+    def embedding_storage(self) -> EmbeddingStorage:
+        return self._embedding_storage or current_embedding_storage()
+
+    def _embed_search_query(self, text: str) -> List[float]:
+        return self.embedding_storage.prepare_query(self._embed_query(text))
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        embeddings = {
+            text: self.embedding_cache.get(model=self.embedding_model, text=text)
+            for text in texts
+        }
+        missing_texts = [text for text, embedding in embeddings.items() if embedding is None]
+        if missing_texts:
+            new_embeddings = self.embedding_batcher.embed_batch(missing_texts)
+            for text, embedding in zip(missing_texts, new_embeddings):
+                self.embedding_cache.put(
+                    model=self.embedding_model, text=text, embedding=embedding
+                )
+                embeddings[text] = embedding
+        self.embedding_cache.log_stats()
+        return [embeddings[text] for text in texts]
+
+    def _search_output_entities_with_interfaces(
+        self, text: str, top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        向量检索 OutputEntity 并展开到相关 Interface。
+        hybrid_search 时与词法检索结果融合；查询就是某个名称或接口编码时不再请求向量服务。
+        """
+        if not self.hybrid_search:
+            return self.repository.search_output_entities_with_interfaces(
+                embedding=self._embed_search_query(text), top_k=top_k
+            )
+
+        lexical_index = get_lexical_index(self.repository)
+        lexical_records = [
+            record for record, _ in lexical_index.search(query=text, top_k=top_k)
+        ]
+        exact_records = lexical_index.exact_matches(text)
+        if exact_records:
+            return reciprocal_rank_fusion(
+                [exact_records, lexical_records], top_k=top_k
+            )
+
+        vector_records = self.repository.search_output_entities_with_interfaces(
+            embedding=self._embed_search_query(text), top_k=top_k
         )
-        return documents
+        return reciprocal_rank_fusion(
+            [vector_records, lexical_records], top_k=top_k
+        )
+
+    def output_entity_hits(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """search_similar_output_entities 的结构化结果，也用于 AgentSystem 的预检索。"""
+        records = self._search_output_entities_with_interfaces(text=query, top_k=top_k)
+        return [
+            {
+                "序号": index,
+                "实体id": record["entity_id"],
+                "实体名称": record["entity_name"],
+                "实体描述": record["entity_description"],
+                "相关接口id": record["interface_id"],
+                "相关接口名称": record["interface_name"],
+                "相关接口描述": record["interface_description"],
+            }
+            for index, record in enumerate(records, 1)
+        ]
+
+    def cim_class_hits(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """search_similar_cim_classes 的结构化结果。"""
+        cim_classes = self._search_similar_nodes(
+            text=query, node_label="CIMClass", top_k=top_k
+        )
+        return [
+            {"序号": index, **cim_class.meta}
+            for index, cim_class in enumerate(cim_classes, 1)
+        ]
 
     def search_similar_output_entities(
         self,
@@ -94,40 +195,14 @@ class ServiceTools(Toolkit):
             query (str): 用户的查询文本。
             top_k (int): 返回的相关业务实体数量，默认为 3。
         """
-        entities = self._search_similar_nodes(
-            text=query, node_label=f"OutputEntity", top_k=top_k
-        )
+        with span(
+            "tool.search_similar_output_entities", query=query, top_k=top_k
+        ) as s:
+            entity_contents = self.output_entity_hits(query=query, top_k=top_k)
+            result = json.dumps(obj=entity_contents, ensure_ascii=False, indent=2)
+            s.set_attribute("result_chars", len(result))
+        return result
 
-        entity_contents = []
-        for index, entity in enumerate(entities, 1):
-            entity_id = entity.id
-            entity_name = entity.meta["name"]
-            entity_description = entity.meta["description"]
-            with self.driver.session(database=self.database) as session:
-                result = session.run(
-                    """
-                    MATCH (e {id: $entity_id})-[r:INPUT_ENTITY|OUTPUT_ENTITY]-(i:Interface)
-                    RETURN DISTINCT i.id AS id, i.name AS name, i.llm_function_description AS description
-                    """,
-                    entity_id=entity_id,
-                ).data()
-                interface_id = result[0]["id"]
-                interface_name = result[0]["name"]
-                interface_description = result[0]["description"]
-
-                entity_content = {
-                    "序号": index,
-                    "实体id": entity_id,
-                    "实体名称": entity_name,
-                    "实体描述": entity_description,
-                    "相关接口id": interface_id,
-                    "相关接口名称": interface_name,
-                    "相关接口描述": interface_description,
-                }
-                entity_contents.append(entity_content)
-
-        return json.dumps(obj=entity_contents, ensure_ascii=False, indent=2)
-    
     def search_similar_cim_classes(
         self,
         query: str,
@@ -140,14 +215,8 @@ class ServiceTools(Toolkit):
             query (str): 用户的查询文本。
             top_k (int): 返回的相关业务实体数量，默认为 3。
         """
-        cim_classes = self._search_similar_nodes(
-            text=query, node_label=f"CIMClass", top_k=top_k
-        )
-        cim_class_contents = []
-        for index, cim_class in enumerate(cim_classes, 1):
-            cim_class_content = {
-                "序号": index,
-                **cim_class.meta,
-            }
-            cim_class_contents.append(cim_class_content)
-        return json.dumps(obj=cim_class_contents, ensure_ascii=False, indent=2)
+        with span("tool.search_similar_cim_classes", query=query, top_k=top_k) as s:
+            cim_class_contents = self.cim_class_hits(query=query, top_k=top_k)
+            result = json.dumps(obj=cim_class_contents, ensure_ascii=False, indent=2)
+            s.set_attribute("result_chars", len(result))
+        return result
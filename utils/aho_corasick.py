@@ -0,0 +1,78 @@
+from collections import deque
+from typing import Any, Dict, Generic, List, Set, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class AhoCorasick(Generic[T]):
+    """
+    多模式字符串匹配自动机：构建后一次扫描文本即可找出所有模式的出现位置，
+    耗时与文本长度和匹配数成正比，与模式数量无关。
+    """
+
+    def __init__(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 节点 -> 以该节点结尾的 (模式长度, 值)；_outputs 另外包含 fail 链上的输出
+        self._terminals: List[List[Tuple[int, T]]] = [[]]
+        self._outputs: List[List[Tuple[int, T]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, value: T) -> None:
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            if char not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminals.append([])
+                self._goto[node][char] = len(self._goto) - 1
+            node = self._goto[node][char]
+        self._terminals[node].append((len(pattern), value))
+        self._built = False
+
+    def build(self) -> "AhoCorasick[T]":
+        self._outputs = [list(terminals) for terminals in self._terminals]
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+                queue.append(child)
+        self._built = True
+        return self
+
+    def find_all(self, text: str) -> List[Tuple[int, int, T]]:
+        """返回所有 (start, end, value)，end 不包含。"""
+        if not self._built:
+            self.build()
+        matches = []
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._outputs[node]:
+                matches.append((i + 1 - length, i + 1, value))
+        return matches
+
+
+def longest_matches(matches: List[Tuple[int, int, Any]]) -> List[Tuple[int, int, Any]]:
+    """去掉被更长匹配完全覆盖的匹配，同一区间的多个值都保留。"""
+    spans: Set[Tuple[int, int]] = {(start, end) for start, end, _ in matches}
+    return [
+        (start, end, value)
+        for start, end, value in matches
+        if not any(
+            other_start <= start and end <= other_end and (other_start, other_end) != (start, end)
+            for other_start, other_end in spans
+        )
+    ]
@@ -0,0 +1,118 @@
+import os
+import atexit
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from neo4j import GraphDatabase, Driver, AsyncGraphDatabase, AsyncDriver
+from loguru import logger
+
+
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))
+NEO4J_WARM_UP_CONNECTIONS = int(os.getenv("NEO4J_WARM_UP_CONNECTIONS", "4"))
+
+_drivers: Dict[Tuple[str, str, str, Optional[str]], Driver] = {}
+_drivers_lock = threading.Lock()
+_async_drivers: Dict[Tuple[str, str, str, Optional[str]], AsyncDriver] = {}
+
+
+def _warm_up(driver: Driver, database: Optional[str], connections: int) -> None:
+    def ping(_):
+        with driver.session(database=database) as session:
+            session.run("RETURN 1").consume()
+
+    # 同时打开多个会话，让连接池里预先建立好连接
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        list(executor.map(ping, range(connections)))
+
+
+def get_driver(
+    uri: str,
+    user: str,
+    password: str,
+    database: Optional[str] = None,
+    max_connection_pool_size: int = NEO4J_MAX_POOL_SIZE,
+    connection_acquisition_timeout: float = NEO4J_ACQUISITION_TIMEOUT,
+    warm_up_connections: int = NEO4J_WARM_UP_CONNECTIONS,
+) -> Driver:
+    """
+    进程内共享的 Neo4j driver，按 (uri, user, password, database) 复用，修改密码后不会复用旧的 driver。
+    第一次创建时检查连通性并预热连接池，之后的调用直接返回同一个 driver。
+    """
+    key = (uri, user, password, database)
+    with _drivers_lock:
+        driver = _drivers.get(key)
+        if driver is not None:
+            return driver
+
+        try:
+            driver = GraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_pool_size=max_connection_pool_size,
+                connection_acquisition_timeout=connection_acquisition_timeout,
+            )
+            driver.verify_connectivity()
+            if warm_up_connections > 0:
+                _warm_up(driver, database, min(warm_up_connections, max_connection_pool_size))
+            logger.debug(f"Connected to Neo4j database {database} at {uri}")
+        except Exception as e:
+            logger.error(f"Failed to connect to Neo4j: {e}")
+            raise
+        _drivers[key] = driver
+        return driver
+
+
+async def get_async_driver(
+    uri: str,
+    user: str,
+    password: str,
+    database: Optional[str] = None,
+    max_connection_pool_size: int = NEO4J_MAX_POOL_SIZE,
+    connection_acquisition_timeout: float = NEO4J_ACQUISITION_TIMEOUT,
+) -> AsyncDriver:
+    """
+    get_driver 的 asyncio 版本，供 AgentSystem.aresponse 使用。
+    async driver 与事件循环绑定，应在同一个事件循环中使用。
+    """
+    key = (uri, user, password, database)
+    driver = _async_drivers.get(key)
+    if driver is not None:
+        return driver
+
+    driver = AsyncGraphDatabase.driver(
+        uri,
+        auth=(user, password),
+        max_connection_pool_size=max_connection_pool_size,
+        connection_acquisition_timeout=connection_acquisition_timeout,
+    )
+    try:
+        await driver.verify_connectivity()
+    except Exception as e:
+        logger.error(f"Failed to connect to Neo4j: {e}")
+        await driver.close()
+        raise
+    # 并发的第一次调用可能都创建了 driver，只保留先注册的那个
+    if key in _async_drivers:
+        await driver.close()
+        return _async_drivers[key]
+    _async_drivers[key] = driver
+    return driver
+
+
+async def close_async_drivers() -> None:
+    drivers = list(_async_drivers.values())
+    _async_drivers.clear()
+    for driver in drivers:
+        await driver.close()
+
+
+def close_drivers() -> None:
+    with _drivers_lock:
+        for driver in _drivers.values():
+            driver.close()
+        _drivers.clear()
+
+
+atexit.register(close_drivers)
@@ -0,0 +1,90 @@
+import time
+import threading
+
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.gateway import get_gateway
+
+
+class _Pending:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.event = threading.Event()
+        self.embedding: Optional[List[float]] = None
+        self.error: Optional[BaseException] = None
+
+
+class EmbeddingBatcher:
+    """
+    把短时间内并发到达的单条向量请求合并成一次 embeddings.create 调用。
+    第一个到达的线程等待 max_wait 秒收集同批请求，然后替整批发出请求。
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], List[List[float]]],
+        max_wait: float = 0.005,
+        max_batch_size: int = 64,
+    ) -> None:
+        self.embed_many = embed_many
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self._pending: List[_Pending] = []
+        self._collecting = False
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> List[float]:
+        pending = _Pending(text)
+        with self._lock:
+            self._pending.append(pending)
+            is_leader = not self._collecting
+            self._collecting = True
+
+        if is_leader:
+            time.sleep(self.max_wait)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._collecting = False
+            self._flush(batch)
+
+        pending.event.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.embedding
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """一次请求多条文本，按 max_batch_size 拆分为多个 embeddings.create 调用。"""
+        unique_texts = list(dict.fromkeys(texts))
+        embeddings = {}
+        for i in range(0, len(unique_texts), self.max_batch_size):
+            chunk = unique_texts[i : i + self.max_batch_size]
+            embeddings.update(zip(chunk, self.embed_many(chunk)))
+        return [embeddings[text] for text in texts]
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        texts = list(dict.fromkeys(pending.text for pending in batch))
+        try:
+            embeddings = dict(zip(texts, self.embed_batch(texts)))
+            for pending in batch:
+                pending.embedding = embeddings[pending.text]
+        except BaseException as e:
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.event.set()
+
+
+_batchers: Dict[Tuple[str, str], EmbeddingBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_embedding_batcher(base_url: str, model: str) -> EmbeddingBatcher:
+    key = (base_url, model)
+    with _batchers_lock:
+        if key not in _batchers:
+            _batchers[key] = EmbeddingBatcher(
+                embed_many=lambda texts: get_gateway().embed(
+                    base_url=base_url, model=model, texts=texts
+                )
+            )
+        return _batchers[key]
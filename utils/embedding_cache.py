@@ -0,0 +1,132 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./.cache/embeddings.sqlite3")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    """
+    两级查询向量缓存：内存 LRU + 磁盘 sqlite，键为 (model, 归一化文本)。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_memory_items: int = 4096,
+    ) -> None:
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, text)
+                )
+                """
+            )
+            self._db.commit()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = (model, normalize_text(text))
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND text = ?", key
+                ).fetchone()
+                if row is not None:
+                    embedding = np.frombuffer(row[0], dtype=np.float32).tolist()
+                    self._remember(key, embedding)
+                    self._stats["disk_hits"] += 1
+                    return embedding
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, model: str, text: str, embedding: List[float]) -> None:
+        key = (model, normalize_text(text))
+        with self._lock:
+            self._remember(key, embedding)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (model, text, vector) VALUES (?, ?, ?)",
+                    (*key, np.asarray(embedding, dtype=np.float32).tobytes()),
+                )
+                self._db.commit()
+
+    def get_or_compute(
+        self, model: str, text: str, compute: Callable[[str], List[float]]
+    ) -> List[float]:
+        embedding = self.get(model=model, text=text)
+        if embedding is None:
+            embedding = compute(text)
+            self.put(model=model, text=text, embedding=embedding)
+        return embedding
+
+    def _remember(self, key: Tuple[str, str], embedding: List[float]) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = sum(stats.values())
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["lookups"] = lookups
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+    def log_stats(self) -> None:
+        stats = self.stats
+        logger.debug(
+            "Embedding cache: {lookups} lookups, hit rate {hit_rate:.2%} "
+            "(memory {memory_hits}, disk {disk_hits}, miss {misses})".format(**stats)
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path: str = DEFAULT_CACHE_PATH) -> EmbeddingCache:
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = EmbeddingCache(path=path)
+        return _caches[path]
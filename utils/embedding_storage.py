@@ -0,0 +1,160 @@
+import os
+import json
+import threading
+import numpy as np
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+from loguru import logger
+
+
+DEFAULT_MANIFEST_PATH = os.getenv(
+    "EMBEDDING_MANIFEST_PATH", "./.cache/embedding_manifest.json"
+)
+
+StorageDtype = Literal["float32", "float16", "int8"]
+_NUMPY_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+@dataclass
+class EmbeddingStorage:
+    """
+    向量的存储方式：dimensions 为前缀截断后的维度（Matryoshka 模型），None 表示不截断；
+    dtype 为本地向量文件和快照中的精度。Neo4j 向量索引只支持浮点，节点属性始终写为 float32。
+    int8 为逐行对称量化，cosine 检索时缩放系数会被归一化抵消，因此不单独保存。
+    """
+
+    dtype: StorageDtype = "float32"
+    dimensions: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.dtype not in _NUMPY_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {self.dtype}")
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingStorage":
+        dimensions = os.getenv("EMBEDDING_DIMENSIONS")
+        return cls(
+            dtype=os.getenv("EMBEDDING_DTYPE", "float32"),
+            dimensions=int(dimensions) if dimensions else None,
+        )
+
+    def truncate(self, vectors: Union[List[float], np.ndarray]) -> np.ndarray:
+        """截断到前 dimensions 维并重新归一化，一维或二维输入。"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dimensions is None or vectors.shape[-1] <= self.dimensions:
+            return vectors
+        vectors = vectors[..., : self.dimensions]
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def prepare_query(self, embedding: List[float]) -> List[float]:
+        """查询向量与存储的向量保持相同维度。"""
+        if self.dimensions is None:
+            return embedding
+        return self.truncate(embedding).tolist()
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        matrix = self.truncate(matrix)
+        if self.dtype == "int8":
+            scale = np.max(np.abs(matrix), axis=-1, keepdims=True)
+            return np.round(matrix / np.maximum(scale, 1e-12) * 127).astype(np.int8)
+        return matrix.astype(_NUMPY_DTYPES[self.dtype])
+
+    @staticmethod
+    def decode(matrix: np.ndarray) -> np.ndarray:
+        # 只用于 cosine 检索，int8 不需要还原缩放系数
+        return np.asarray(matrix).astype(np.float32, copy=False)
+
+    def bytes_per_vector(self, dimensions: int) -> int:
+        return (self.dimensions or dimensions) * np.dtype(_NUMPY_DTYPES[self.dtype]).itemsize
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def save_manifest(
+    storage: EmbeddingStorage,
+    model: str,
+    path: str = DEFAULT_MANIFEST_PATH,
+    **extra: Any,
+) -> None:
+    """嵌入脚本写入，查询侧据此截断查询向量。"""
+    manifest = load_manifest(path)
+    manifest.update({"model": model, "storage": storage.to_dict(), **extra})
+    _write_manifest(manifest, path)
+
+
+def _write_manifest(manifest: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_manifest(path: str = DEFAULT_MANIFEST_PATH) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_embedding_storage(path: str = DEFAULT_MANIFEST_PATH) -> EmbeddingStorage:
+    storage = load_manifest(path).get("storage")
+    if storage is None:
+        return EmbeddingStorage()
+    logger.debug(f"Embedding storage from {path}: {storage}")
+    return EmbeddingStorage(**storage)
+
+
+# path -> (修改时间, manifest)，查询路径上只 stat 文件
+_manifest_cache: Dict[str, Tuple[Optional[float], Dict[str, Any]]] = {}
+_manifest_lock = threading.Lock()
+
+
+def _cached_manifest(path: str) -> Dict[str, Any]:
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        mtime = None
+    cached = _manifest_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _manifest_lock:
+        manifest = load_manifest(path) if mtime is not None else {}
+        _manifest_cache[path] = (mtime, manifest)
+    return manifest
+
+
+def current_embedding_storage(path: str = DEFAULT_MANIFEST_PATH) -> EmbeddingStorage:
+    """同 load_embedding_storage，但随 manifest 更新，嵌入脚本切换到新维度的索引后查询侧同时切换。"""
+    storage = _cached_manifest(path).get("storage")
+    return EmbeddingStorage(**storage) if storage else EmbeddingStorage()
+
+
+def vector_index_alias(label: str, path: str = DEFAULT_MANIFEST_PATH) -> Dict[str, str]:
+    """
+    label 当前生效的向量索引名、向量属性和本地向量文件名。重建索引时嵌入脚本写入新版本并切换，
+    查询侧按 manifest 的修改时间自动跟随；未切换过时为 {label}-embedding / embedding / {label}。
+    """
+    alias = _cached_manifest(path).get("vector_indexes", {}).get(label, {})
+    return {
+        "index": alias.get("index", f"{label}-embedding"),
+        "property": alias.get("property", "embedding"),
+        "local_index": alias.get("local_index", label),
+    }
+
+
+def update_vector_index_alias(
+    label: str, path: str = DEFAULT_MANIFEST_PATH, **fields: Any
+) -> None:
+    """合并写入 manifest 中某个 label 的向量索引信息，值为 None 的字段删除。"""
+    manifest = load_manifest(path)
+    alias = manifest.setdefault("vector_indexes", {}).setdefault(label, {})
+    for key, value in fields.items():
+        if value is None:
+            alias.pop(key, None)
+        else:
+            alias[key] = value
+    _write_manifest(manifest, path)
@@ -0,0 +1,244 @@
+import os
+import time
+import random
+import threading
+import httpx
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from openai import (
+    OpenAI,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+)
+from loguru import logger
+from utils.tracing import span
+
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _Endpoint:
+    def __init__(self, max_concurrency: int, requests_per_second: float) -> None:
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = (
+            TokenBucket(rate=requests_per_second) if requests_per_second > 0 else None
+        )
+
+
+class ModelGateway:
+    """
+    进程内共享的模型调用入口：每个 (base_url, api_key) 复用一个带连接池的
+    OpenAI 客户端，并对每个 base_url 做并发限制、令牌桶限流和 429/5xx 退避重试。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_second: float = 0.0,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        max_connections: int = 32,
+        timeout: float = 120.0,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_connections = max_connections
+        self.timeout = timeout
+
+        self._clients: Dict[Tuple[str, Optional[str]], OpenAI] = {}
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._endpoint_limits: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelGateway":
+        return cls(
+            max_concurrency=int(os.getenv("GATEWAY_MAX_CONCURRENCY", "8")),
+            requests_per_second=float(os.getenv("GATEWAY_REQUESTS_PER_SECOND", "0")),
+            max_retries=int(os.getenv("GATEWAY_MAX_RETRIES", "5")),
+        )
+
+    def configure_endpoint(
+        self,
+        base_url: str,
+        max_concurrency: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            self._endpoint_limits[base_url] = (
+                max_concurrency or self.max_concurrency,
+                (
+                    self.requests_per_second
+                    if requests_per_second is None
+                    else requests_per_second
+                ),
+            )
+            self._endpoints.pop(base_url, None)
+
+    def client(self, base_url: str, api_key: Optional[str]) -> OpenAI:
+        key = (base_url, api_key)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = OpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    max_retries=0,
+                    timeout=self.timeout,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                        ),
+                        timeout=self.timeout,
+                    ),
+                )
+            return self._clients[key]
+
+    def _endpoint(self, base_url: str) -> _Endpoint:
+        with self._lock:
+            if base_url not in self._endpoints:
+                max_concurrency, requests_per_second = self._endpoint_limits.get(
+                    base_url, (self.max_concurrency, self.requests_per_second)
+                )
+                self._endpoints[base_url] = _Endpoint(
+                    max_concurrency=max_concurrency,
+                    requests_per_second=requests_per_second,
+                )
+            return self._endpoints[base_url]
+
+    def call(self, base_url: str, request: Callable[[], T]) -> T:
+        endpoint = self._endpoint(base_url)
+        attempt = 0
+        while True:
+            if endpoint.bucket is not None:
+                endpoint.bucket.acquire()
+            try:
+                with endpoint.semaphore:
+                    return request()
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"Request to {base_url} failed ({type(e).__name__}), retry in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, (APIConnectionError, APITimeoutError)):
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return False
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except (TypeError, ValueError):
+                pass
+        delay = min(self.backoff_base * (2**attempt), self.backoff_max)
+        return delay * (0.5 + random.random() / 2)
+
+    def chat(
+        self,
+        base_url: str,
+        api_key: Optional[str],
+        model: str,
+        messages: List[Dict[str, str]],
+        **kwargs: Any,
+    ) -> str:
+        client = self.client(base_url=base_url, api_key=api_key)
+        with span(
+            "llm.chat",
+            model=model,
+            base_url=base_url,
+            input_chars=sum(len(message["content"]) for message in messages),
+        ) as s:
+            response = self.call(
+                base_url,
+                lambda: client.chat.completions.create(
+                    model=model, messages=messages, **kwargs
+                ),
+            )
+            content = response.choices[0].message.content
+            usage = getattr(response, "usage", None)
+            s.set_attributes(
+                input_tokens=getattr(usage, "prompt_tokens", None),
+                output_tokens=getattr(usage, "completion_tokens", None),
+                output_chars=len(content or ""),
+            )
+        return content
+
+    def embed(
+        self,
+        base_url: str,
+        model: str,
+        texts: List[str],
+        api_key: Optional[str] = "fake_key",
+    ) -> List[List[float]]:
+        client = self.client(base_url=base_url, api_key=api_key)
+        with span(
+            "embedding.request",
+            model=model,
+            base_url=base_url,
+            batch_size=len(texts),
+            input_chars=sum(len(text) for text in texts),
+        ) as s:
+            response = self.call(
+                base_url,
+                lambda: client.embeddings.create(input=texts, model=model),
+            )
+            usage = getattr(response, "usage", None)
+            s.set_attribute("input_tokens", getattr(usage, "prompt_tokens", None))
+        data = sorted(response.data, key=lambda item: item.index)
+        return [item.embedding for item in data]
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+_gateway: Optional[ModelGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> ModelGateway:
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = ModelGateway.from_env()
+        return _gateway
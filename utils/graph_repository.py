@@ -0,0 +1,510 @@
+import os
+import json
+import asyncio
+import threading
+import numpy as np
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from haystack import Document
+from neo4j import Driver
+from loguru import logger
+from utils.utils import get_database_version
+from utils.drivers import get_driver, get_async_driver
+from utils.vector_index import (
+    DEFAULT_INDEX_DIR,
+    cosine_top_k,
+    get_vector_index,
+    normalize_rows,
+)
+from utils.tracing import span
+from utils.embedding_storage import EmbeddingStorage, vector_index_alias
+
+
+SNAPSHOT_LABELS = ("Interface", "OutputEntity", "InputEntity", "CIMClass")
+SNAPSHOT_RELATIONS = ("INPUT_ENTITY", "OUTPUT_ENTITY")
+
+INTERFACES_QUERY = """
+UNWIND $interface_ids AS interface_id
+MATCH (i:Interface {id: interface_id})
+RETURN i.id AS id, i.name AS name, i.llm_description AS llm_description,
+    i.llm_function_description AS llm_function_description
+"""
+
+VECTOR_SEARCH_QUERY = """
+CALL db.index.vector.queryNodes($index_name, $top_k, $embedding)
+YIELD node, score
+RETURN node.id AS id,
+    [key IN keys(node) WHERE key <> 'id' AND NOT key STARTS WITH 'embedding' | [key, node[key]]] AS meta,
+    score
+ORDER BY score DESC
+"""
+
+OUTPUT_ENTITY_INTERFACES_QUERY = """
+UNWIND $entity_ids AS entity_id
+MATCH (node:OutputEntity {id: entity_id})
+OPTIONAL MATCH (node)-[:INPUT_ENTITY|OUTPUT_ENTITY]-(i:Interface)
+WITH node, collect(DISTINCT i)[0] AS i
+RETURN node.id AS entity_id, node.name AS entity_name, node.description AS entity_description,
+    i.id AS interface_id, i.name AS interface_name, i.llm_function_description AS interface_description
+"""
+
+VECTOR_SEARCH_OUTPUT_ENTITY_INTERFACES_QUERY = """
+CALL db.index.vector.queryNodes($index_name, $top_k, $embedding)
+YIELD node, score
+OPTIONAL MATCH (node)-[:INPUT_ENTITY|OUTPUT_ENTITY]-(i:Interface)
+WITH node, score, collect(DISTINCT i)[0] AS i
+RETURN node.id AS entity_id, node.name AS entity_name, node.description AS entity_description,
+    i.id AS interface_id, i.name AS interface_name, i.llm_function_description AS interface_description
+ORDER BY score DESC
+"""
+
+INTERFACE_KEYS_QUERY = """
+MATCH (i:Interface)
+RETURN i.id AS id, i.name AS name, i.standard_name AS standard_name,
+    i.code AS code, i.production_url AS production_url,
+    i.llm_function_description AS llm_function_description
+"""
+
+INTERFACE_KEY_FIELDS = ("name", "standard_name", "code", "production_url")
+
+OUTPUT_ENTITIES_WITH_INTERFACES_QUERY = """
+MATCH (node:OutputEntity)
+OPTIONAL MATCH (node)-[:INPUT_ENTITY|OUTPUT_ENTITY]-(i:Interface)
+WITH node, collect(DISTINCT i)[0] AS i
+RETURN node.id AS entity_id, node.name AS entity_name, node.description AS entity_description,
+    i.id AS interface_id, i.name AS interface_name, i.llm_function_description AS interface_description,
+    i.standard_name AS interface_standard_name, i.code AS interface_code
+"""
+
+
+class GraphRepository(ABC):
+    """
+    InterfaceAction 和 ServiceTools 访问服务图的接口。
+    """
+
+    @abstractmethod
+    def get_interfaces(self, interface_ids: List[str]) -> List[Dict[str, Any]]:
+        """返回 {id, name, llm_description, llm_function_description}，不存在的 id 被忽略。"""
+        ...
+
+    async def aget_interfaces(self, interface_ids: List[str]) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_interfaces, interface_ids)
+
+    @abstractmethod
+    def search_similar_nodes(
+        self, label: str, embedding: List[float], top_k: int
+    ) -> List[Document]:
+        ...
+
+    @abstractmethod
+    def search_output_entities_with_interfaces(
+        self, embedding: List[float], top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        向量检索 OutputEntity 并展开到一个相关 Interface，返回 entity_id, entity_name,
+        entity_description, interface_id, interface_name, interface_description。
+        """
+        ...
+
+    @abstractmethod
+    def list_interfaces(self) -> List[Dict[str, Any]]:
+        """所有 Interface 的 id, name, standard_name, code, production_url 和 llm_function_description。"""
+        ...
+
+    @abstractmethod
+    def list_output_entities_with_interfaces(self) -> List[Dict[str, Any]]:
+        """
+        所有 OutputEntity 及其相关 Interface，字段同上，另加 interface_standard_name 和 interface_code，
+        用于构建词法索引。
+        """
+        ...
+
+    def version(self) -> Optional[int]:
+        """数据版本，变化时上层缓存失效；None 表示未知。"""
+        return None
+
+
+class Neo4jGraphRepository(GraphRepository):
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        database: str,
+        use_local_vector_index: bool = False,
+        vector_index_dir: str = DEFAULT_INDEX_DIR,
+    ) -> None:
+        self.uri = uri
+        self.user = user
+        self.password = password
+        self.database = database
+        self.use_local_vector_index = use_local_vector_index
+        self.vector_index_dir = vector_index_dir
+        self.driver = get_driver(uri, user, password, database)
+
+    def _run_query(self, name: str, query: str, **params) -> List[Dict[str, Any]]:
+        with span("neo4j.query", query=name, database=self.database) as s:
+            with self.driver.session(database=self.database) as session:
+                records = session.run(query, **params).data()
+            s.set_attribute("records", len(records))
+        return records
+
+    def get_interfaces(self, interface_ids: List[str]) -> List[Dict[str, Any]]:
+        return self._run_query(
+            "interfaces_by_ids", INTERFACES_QUERY, interface_ids=interface_ids
+        )
+
+    async def aget_interfaces(self, interface_ids: List[str]) -> List[Dict[str, Any]]:
+        driver = await get_async_driver(
+            self.uri, self.user, self.password, self.database
+        )
+        with span("neo4j.query", query="interfaces_by_ids", database=self.database) as s:
+            async with driver.session(database=self.database) as session:
+                result = await session.run(INTERFACES_QUERY, interface_ids=interface_ids)
+                records = await result.data()
+            s.set_attribute("records", len(records))
+        return records
+
+    def search_similar_nodes(
+        self, label: str, embedding: List[float], top_k: int
+    ) -> List[Document]:
+        if self.use_local_vector_index:
+            return get_vector_index(label=label, directory=self.vector_index_dir).search(
+                query_embedding=embedding, top_k=top_k
+            )
+
+        records = self._run_query(
+            "vector_search",
+            VECTOR_SEARCH_QUERY,
+            index_name=vector_index_alias(label)["index"],
+            top_k=top_k,
+            embedding=embedding,
+        )
+        documents = []
+        for record in records:
+            meta = {k: v for k, v in record["meta"] if v is not None}
+            documents.append(Document(id=record["id"], meta=meta, score=record["score"]))
+        return documents
+
+    def search_output_entities_with_interfaces(
+        self, embedding: List[float], top_k: int
+    ) -> List[Dict[str, Any]]:
+        if self.use_local_vector_index:
+            entities = get_vector_index(
+                label="OutputEntity", directory=self.vector_index_dir
+            ).search(query_embedding=embedding, top_k=top_k)
+            records = self._run_query(
+                "output_entity_interfaces",
+                OUTPUT_ENTITY_INTERFACES_QUERY,
+                entity_ids=[entity.id for entity in entities],
+            )
+            order = {entity.id: i for i, entity in enumerate(entities)}
+            return sorted(records, key=lambda record: order[record["entity_id"]])
+
+        return self._run_query(
+            "vector_search_output_entity_interfaces",
+            VECTOR_SEARCH_OUTPUT_ENTITY_INTERFACES_QUERY,
+            index_name=vector_index_alias("OutputEntity")["index"],
+            top_k=top_k,
+            embedding=embedding,
+        )
+
+    def list_interfaces(self) -> List[Dict[str, Any]]:
+        return self._run_query("interface_keys", INTERFACE_KEYS_QUERY)
+
+    def list_output_entities_with_interfaces(self) -> List[Dict[str, Any]]:
+        return self._run_query(
+            "output_entities_with_interfaces", OUTPUT_ENTITIES_WITH_INTERFACES_QUERY
+        )
+
+    def version(self) -> Optional[int]:
+        return get_database_version(self.driver, self.database)
+
+
+def export_snapshot(
+    driver: Driver,
+    database: str,
+    path: str,
+    embedding_property: Optional[str] = None,
+    storage: Optional[EmbeddingStorage] = None,
+) -> Dict[str, int]:
+    """
+    把 Interface / OutputEntity / InputEntity / CIMClass 节点、它们的向量和
+    INPUT_ENTITY / OUTPUT_ENTITY 边导出为一个 .npz 快照（格式见 write_snapshot）。
+    embedding_property 为 None 时使用 manifest 中各 label 当前的向量属性。
+    """
+    nodes: Dict[str, List[Dict[str, Any]]] = {}
+    vectors: Dict[str, List[Optional[List[float]]]] = {}
+    edges: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+    with driver.session(database=database) as session:
+        for label in SNAPSHOT_LABELS:
+            vector_property = embedding_property or vector_index_alias(label)["property"]
+            nodes[label], vectors[label] = [], []
+            for record in session.run(
+                f"MATCH (n:`{label}`) RETURN n.id AS id, properties(n) AS props"
+            ):
+                node_props = dict(record["props"])
+                vectors[label].append(node_props.get(vector_property))
+                nodes[label].append({**node_props, "id": record["id"]})
+
+        for relation in SNAPSHOT_RELATIONS:
+            for label in ("InputEntity", "OutputEntity"):
+                edges[(relation, label)] = [
+                    (record["interface_id"], record["entity_id"])
+                    for record in session.run(
+                        f"""
+                        MATCH (i:Interface)-[:{relation}]-(e:`{label}`)
+                        RETURN i.id AS interface_id, e.id AS entity_id
+                        """
+                    )
+                ]
+
+    return write_snapshot(
+        path=path,
+        nodes=nodes,
+        vectors=vectors,
+        edges=edges,
+        storage=storage,
+        manifest={
+            "database": database,
+            "version": get_database_version(driver, database),
+        },
+    )
+
+
+def write_snapshot(
+    path: str,
+    nodes: Dict[str, List[Dict[str, Any]]],
+    vectors: Dict[str, List[Optional[List[float]]]],
+    edges: Dict[Tuple[str, str], List[Tuple[str, str]]],
+    storage: Optional[EmbeddingStorage] = None,
+    manifest: Optional[Dict[str, Any]] = None,
+) -> Dict[str, int]:
+    """
+    写入 SnapshotGraphRepository 读取的 .npz 快照。nodes 为每个 label 的节点属性（含 id），
+    vectors 与之一一对应（没有向量为 None），edges 的键为 (关系, entity label)，值为 (interface id, entity id)。
+    文件中每个 label 一个向量矩阵（精度和维度由 storage 决定），边为 (interface 行号, entity 行号) 的 int32 数组，
+    节点 id 和属性以 JSON 存放，embedding 开头的属性不保存。
+    """
+    content: Dict[str, Dict[str, Any]] = {}
+    arrays: Dict[str, np.ndarray] = {}
+    for label in SNAPSHOT_LABELS:
+        label_nodes = nodes.get(label, [])
+        label_vectors = vectors.get(label, [None] * len(label_nodes))
+        dim = max((len(v) for v in label_vectors if v is not None), default=0)
+        matrix = np.zeros((len(label_nodes), dim), dtype=np.float32)
+        for i, vector in enumerate(label_vectors):
+            if vector is not None:
+                matrix[i] = vector
+        content[label] = {
+            "ids": [node["id"] for node in label_nodes],
+            "props": [
+                {
+                    k: v
+                    for k, v in node.items()
+                    if k != "id" and not k.startswith("embedding")
+                }
+                for node in label_nodes
+            ],
+        }
+        arrays[f"embedding/{label}"] = (
+            (storage or EmbeddingStorage()).encode(matrix) if matrix.size else matrix
+        )
+
+    rows = {
+        label: {node_id: i for i, node_id in enumerate(content[label]["ids"])}
+        for label in SNAPSHOT_LABELS
+    }
+    for relation in SNAPSHOT_RELATIONS:
+        for label in ("InputEntity", "OutputEntity"):
+            pairs = [
+                (rows["Interface"][interface_id], rows[label][entity_id])
+                for interface_id, entity_id in edges.get((relation, label), [])
+                if interface_id in rows["Interface"] and entity_id in rows[label]
+            ]
+            arrays[f"edges/{relation}/{label}"] = np.asarray(
+                pairs, dtype=np.int32
+            ).reshape(-1, 2)
+
+    arrays["nodes"] = np.frombuffer(
+        json.dumps(
+            {"manifest": manifest or {}, "nodes": content},
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8"),
+        dtype=np.uint8,
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.tmp", "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(f"{path}.tmp", path)
+
+    counts = {label: len(content[label]["ids"]) for label in SNAPSHOT_LABELS}
+    logger.info(f"Wrote graph snapshot to {path}: {counts}")
+    return counts
+
+
+class _Snapshot:
+    def __init__(self, path: str) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            content = json.loads(data["nodes"].tobytes().decode("utf-8"))
+            arrays = {key: data[key] for key in data.files if key != "nodes"}
+        self.manifest: Dict[str, Any] = content["manifest"]
+        self.ids: Dict[str, List[str]] = {}
+        self.props: Dict[str, List[Dict[str, Any]]] = {}
+        self.rows: Dict[str, Dict[str, int]] = {}
+        self.matrices: Dict[str, np.ndarray] = {}
+        # 向量矩阵只包含有向量的节点，vector_rows 把矩阵行号映射回节点行号
+        self.vector_rows: Dict[str, np.ndarray] = {}
+        for label, label_nodes in content["nodes"].items():
+            self.ids[label] = label_nodes["ids"]
+            self.props[label] = label_nodes["props"]
+            self.rows[label] = {node_id: i for i, node_id in enumerate(label_nodes["ids"])}
+            matrix = arrays[f"embedding/{label}"]
+            has_vector = np.any(matrix != 0, axis=1)
+            self.matrices[label] = normalize_rows(matrix[has_vector])
+            self.vector_rows[label] = np.flatnonzero(has_vector)
+
+        # entity 行号 -> 相关 interface 行号 (CSR)，不区分边的方向和类型
+        self.entity_interfaces: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for label in ("InputEntity", "OutputEntity"):
+            pairs = np.concatenate(
+                [arrays[f"edges/{relation}/{label}"] for relation in SNAPSHOT_RELATIONS]
+            )
+            pairs = pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
+            indptr = np.searchsorted(
+                pairs[:, 1], np.arange(len(self.ids[label]) + 1), side="left"
+            )
+            self.entity_interfaces[label] = (indptr, pairs[:, 0])
+
+    def search(self, label: str, embedding: List[float], top_k: int) -> List[Tuple[int, float]]:
+        top = cosine_top_k(self.matrices[label], embedding, top_k)
+        return [(int(self.vector_rows[label][i]), score) for i, score in top]
+
+    def interfaces_of(self, label: str, row: int) -> np.ndarray:
+        indptr, indices = self.entity_interfaces[label]
+        return np.unique(indices[indptr[row] : indptr[row + 1]])
+
+
+class SnapshotGraphRepository(GraphRepository):
+    """
+    只读的内存图：从 export_snapshot 的文件加载，所有查询在进程内完成，不访问数据库。
+    快照文件被替换后自动重新加载，version() 随之变化使上层缓存失效。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._snapshot: Optional[_Snapshot] = None
+        self._loaded_mtime: Optional[float] = None
+        self._reloads = 0
+        self._lock = threading.Lock()
+        self._maybe_reload()
+
+    def _maybe_reload(self) -> _Snapshot:
+        mtime = os.stat(self.path).st_mtime
+        if mtime != self._loaded_mtime:
+            with self._lock:
+                if mtime != self._loaded_mtime:
+                    self._snapshot = _Snapshot(self.path)
+                    self._loaded_mtime = mtime
+                    self._reloads += 1
+                    logger.info(
+                        f"Loaded graph snapshot {self.path}: "
+                        + ", ".join(
+                            f"{label} {len(ids)}"
+                            for label, ids in self._snapshot.ids.items()
+                        )
+                    )
+        return self._snapshot
+
+    def get_interfaces(self, interface_ids: List[str]) -> List[Dict[str, Any]]:
+        snapshot = self._maybe_reload()
+        rows = snapshot.rows["Interface"]
+        records = []
+        for interface_id in interface_ids:
+            row = rows.get(interface_id)
+            if row is None:
+                continue
+            props = snapshot.props["Interface"][row]
+            records.append(
+                {
+                    "id": interface_id,
+                    "name": props.get("name"),
+                    "llm_description": props.get("llm_description"),
+                    "llm_function_description": props.get("llm_function_description"),
+                }
+            )
+        return records
+
+    async def aget_interfaces(self, interface_ids: List[str]) -> List[Dict[str, Any]]:
+        return self.get_interfaces(interface_ids)
+
+    def search_similar_nodes(
+        self, label: str, embedding: List[float], top_k: int
+    ) -> List[Document]:
+        snapshot = self._maybe_reload()
+        with span("snapshot.search", label=label, top_k=top_k):
+            top = snapshot.search(label, embedding, top_k)
+        return [
+            Document(
+                id=snapshot.ids[label][i], meta=dict(snapshot.props[label][i]), score=score
+            )
+            for i, score in top
+        ]
+
+    def search_output_entities_with_interfaces(
+        self, embedding: List[float], top_k: int
+    ) -> List[Dict[str, Any]]:
+        snapshot = self._maybe_reload()
+        with span("snapshot.search", label="OutputEntity", top_k=top_k):
+            top = snapshot.search("OutputEntity", embedding, top_k)
+        return [self._output_entity_record(snapshot, row) for row, _ in top]
+
+    def list_interfaces(self) -> List[Dict[str, Any]]:
+        snapshot = self._maybe_reload()
+        return [
+            {
+                "id": interface_id,
+                **{field: props.get(field) for field in INTERFACE_KEY_FIELDS},
+                "llm_function_description": props.get("llm_function_description"),
+            }
+            for interface_id, props in zip(
+                snapshot.ids["Interface"], snapshot.props["Interface"]
+            )
+        ]
+
+    def list_output_entities_with_interfaces(self) -> List[Dict[str, Any]]:
+        snapshot = self._maybe_reload()
+        return [
+            self._output_entity_record(snapshot, row)
+            for row in range(len(snapshot.ids["OutputEntity"]))
+        ]
+
+    @staticmethod
+    def _output_entity_record(snapshot: _Snapshot, row: int) -> Dict[str, Any]:
+        props = snapshot.props["OutputEntity"][row]
+        interface_rows = snapshot.interfaces_of("OutputEntity", row)
+        interface_row = interface_rows[0] if len(interface_rows) else None
+        interface = (
+            snapshot.props["Interface"][interface_row] if interface_row is not None else {}
+        )
+        return {
+            "entity_id": snapshot.ids["OutputEntity"][row],
+            "entity_name": props.get("name"),
+            "entity_description": props.get("description"),
+            "interface_id": (
+                snapshot.ids["Interface"][interface_row]
+                if interface_row is not None
+                else None
+            ),
+            "interface_name": interface.get("name"),
+            "interface_description": interface.get("llm_function_description"),
+            "interface_standard_name": interface.get("standard_name"),
+            "interface_code": interface.get("code"),
+        }
+
+    def version(self) -> Optional[int]:
+        # 每次重新加载快照都视为新版本
+        self._maybe_reload()
+        return self._reloads
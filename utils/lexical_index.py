@@ -0,0 +1,200 @@
+import re
+import math
+import time
+import threading
+
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from utils.embedding_cache import normalize_text
+from utils.tracing import span
+
+
+# 连续的字母数字作为一个词（接口编码、英文系统名），其余字符按单字和二元组切分
+_WORD_PATTERN = re.compile(r"[0-9a-z]+|[^\W_0-9a-z]+", re.UNICODE)
+_ASCII_WORD = re.compile(r"^[0-9a-z]+$")
+
+# 接口和业务实体中参与词法检索的字段
+LEXICAL_FIELDS = (
+    "entity_name",
+    "interface_name",
+    "interface_standard_name",
+    "interface_code",
+)
+
+
+def normalize_key(text: str) -> str:
+    return normalize_text(text or "").lower()
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for word in _WORD_PATTERN.findall(normalize_key(text)):
+        if _ASCII_WORD.match(word):
+            tokens.append(word)
+            continue
+        tokens.extend(word)
+        tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+        self._idf: Dict[str, float] = {}
+        self._average_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, text: str) -> int:
+        doc = len(self._lengths)
+        counts = Counter(tokenize(text))
+        for token, tf in counts.items():
+            self._postings[token].append((doc, tf))
+        self._lengths.append(sum(counts.values()))
+        return doc
+
+    def build(self) -> "BM25Index":
+        n = len(self._lengths)
+        self._average_length = sum(self._lengths) / n if n else 0.0
+        self._idf = {
+            token: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+        return self
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self._idf.get(token)
+            if idf is None:
+                continue
+            for doc, tf in self._postings[token]:
+                length_norm = 1 - self.b + self.b * self._lengths[doc] / self._average_length
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+
+
+class LexicalIndex:
+    """
+    OutputEntity 及其相关 Interface 的名称、标准名称、接口编码上的 BM25 倒排索引，
+    每个 Interface 另有一条 entity 字段为空的记录。数据版本变化时在下一次检索前重建。
+    """
+
+    def __init__(
+        self,
+        load_records: Callable[[], List[Dict[str, Any]]],
+        get_version: Callable[[], Optional[int]],
+        check_interval: float = 30.0,
+    ) -> None:
+        self.load_records = load_records
+        self.get_version = get_version
+        self.check_interval = check_interval
+
+        # (bm25, records, 字段值 -> 记录下标) 整体替换
+        self._data: Optional[Tuple[BM25Index, List[Dict[str, Any]], Dict[str, List[int]]]] = None
+        self._version: Optional[int] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._data is not None and now - self._checked_at < self.check_interval:
+            return self._data
+        with self._lock:
+            if self._data is not None and now - self._checked_at < self.check_interval:
+                return self._data
+            self._checked_at = now
+            version = self.get_version()
+            if self._data is None or version != self._version:
+                self._data = LexicalIndex._build(self.load_records())
+                self._version = version
+                logger.debug(f"Built lexical index over {len(self._data[1])} records")
+        return self._data
+
+    @staticmethod
+    def _build(records: List[Dict[str, Any]]):
+        bm25 = BM25Index()
+        exact: Dict[str, List[int]] = defaultdict(list)
+        for i, record in enumerate(records):
+            values = [record.get(field) for field in LEXICAL_FIELDS]
+            bm25.add(" ".join(value for value in values if value))
+            for value in values:
+                if value:
+                    exact[normalize_key(value)].append(i)
+        return bm25.build(), records, dict(exact)
+
+    def exact_matches(self, query: str) -> List[Dict[str, Any]]:
+        """查询文本与某个名称或接口编码完全相同时返回对应记录。"""
+        _, records, exact = self._refresh()
+        return [records[i] for i in exact.get(normalize_key(query), [])]
+
+    def search(self, query: str, top_k: int) -> List[Tuple[Dict[str, Any], float]]:
+        bm25, records, _ = self._refresh()
+        with span("lexical.search", top_k=top_k, documents=len(records)) as s:
+            hits = bm25.search(query, top_k)
+            s.set_attribute("hits", len(hits))
+        return [(records[i], score) for i, score in hits]
+
+
+def record_key(record: Dict[str, Any]) -> Any:
+    # 实体记录按实体 id，只有接口的记录按接口 id
+    return record["entity_id"] or ("interface", record["interface_id"])
+
+
+def lexical_records(repository) -> List[Dict[str, Any]]:
+    """
+    list_output_entities_with_interfaces 的记录加上每个 Interface 一条记录，
+    没有 OutputEntity 或不是实体第一个相关接口的 Interface 也能被词法检索和精确匹配找到。
+    """
+    records = list(repository.list_output_entities_with_interfaces())
+    for interface in repository.list_interfaces():
+        records.append(
+            {
+                "entity_id": None,
+                "entity_name": None,
+                "entity_description": None,
+                "interface_id": interface["id"],
+                "interface_name": interface.get("name"),
+                "interface_description": interface.get("llm_function_description"),
+                "interface_standard_name": interface.get("standard_name"),
+                "interface_code": interface.get("code"),
+            }
+        )
+    return records
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[Dict[str, Any]]],
+    top_k: int,
+    key: Callable[[Dict[str, Any]], Any] = record_key,
+    k: int = 60,
+) -> List[Dict[str, Any]]:
+    """按 sum(1 / (k + rank)) 合并多个排序结果，同一 key 的记录保留第一次出现的那条。"""
+    scores: Dict[Any, float] = defaultdict(float)
+    records: Dict[Any, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, record in enumerate(ranking, 1):
+            scores[key(record)] += 1 / (k + rank)
+            records.setdefault(key(record), record)
+    ordered = sorted(scores, key=lambda item: -scores[item])
+    return [records[item] for item in ordered[:top_k]]
+
+
+_indexes: Dict[Any, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(repository) -> LexicalIndex:
+    """同一个 GraphRepository 的所有 ServiceTools 共用一个词法索引。"""
+    with _indexes_lock:
+        if repository not in _indexes:
+            _indexes[repository] = LexicalIndex(
+                load_records=lambda: lexical_records(repository),
+                get_version=repository.version,
+            )
+        return _indexes[repository]
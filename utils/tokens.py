@@ -0,0 +1,4 @@
+def estimate_tokens(text: str) -> int:
+    # 粗略估计：中文约一字一个 token，其他字符约四个字符一个 token
+    cjk = sum(1 for ch in text if "\u4e00" <= ch <= "\u9fff")
+    return cjk + (len(text) - cjk + 3) // 4
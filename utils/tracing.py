@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import queue
+import atexit
+import secrets
+import threading
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, TypeVar
+from loguru import logger
+
+
+T = TypeVar("T")
+
+
+class Span:
+    def __init__(
+        self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @staticmethod
+    def _otel_value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def to_otel(self) -> Dict[str, Any]:
+        """OTLP/JSON 的 span 结构。"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": Span._otel_value(value)}
+                for key, value in self.attributes.items()
+                if value is not None
+            ],
+            "status": (
+                {"code": "STATUS_CODE_ERROR", "message": self.error}
+                if self.error
+                else {"code": "STATUS_CODE_OK"}
+            ),
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    轻量级嵌套 span 记录。span 结束时通知已注册的监听器，并由后台线程追加到 JSONL 文件
+    （每行一个 OTLP/JSON span），不在调用方线程或事件循环中写文件。
+    没有输出文件也没有监听器时不做任何记录。
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._listeners: List[Callable[[Span], None]] = []
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self._listeners)
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Span], None]) -> None:
+        self._listeners.remove(listener)
+
+    @staticmethod
+    def _start(name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Span:
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        self._export(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        span = Tracer._start(name, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # 生成器在其他上下文中结束时无法 reset，直接恢复父 span
+                _current_span.set(parent)
+            self._finish(span)
+
+    def iter_span(self, name: str, iterator: Iterator[T], **attributes: Any) -> Iterator[T]:
+        """
+        在 span 中迭代 iterator。只在取下一个元素期间激活该 span 和 iterator 内部打开的 span，
+        yield 给调用方时恢复调用方的上下文，span 不会泄漏到消费者的代码中。
+        """
+        if not self.enabled:
+            yield from iterator
+            return
+
+        span = Tracer._start(name, _current_span.get(), attributes)
+        # iterator 内部看到的当前 span，跨 yield 保存
+        inner = span
+        try:
+            while True:
+                token = _current_span.set(inner)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    inner = _current_span.get()
+                    _current_span.reset(token)
+                yield item
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                token = _current_span.set(inner)
+                try:
+                    close()
+                finally:
+                    _current_span.reset(token)
+            self._finish(span)
+
+    async def aiter_span(
+        self, name: str, iterator: AsyncIterator[T], **attributes: Any
+    ) -> AsyncIterator[T]:
+        """iter_span 的异步版本。"""
+        if not self.enabled:
+            async for item in iterator:
+                yield item
+            return
+
+        span = Tracer._start(name, _current_span.get(), attributes)
+        inner = span
+        try:
+            while True:
+                token = _current_span.set(inner)
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    inner = _current_span.get()
+                    _current_span.reset(token)
+                yield item
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                token = _current_span.set(inner)
+                try:
+                    await aclose()
+                finally:
+                    _current_span.reset(token)
+            self._finish(span)
+
+    def _export(self, span: Span) -> None:
+        for listener in list(self._listeners):
+            listener(span)
+        if self.path:
+            self._queue.put(span.to_otel())
+            self._start_writer()
+
+    def _start_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="tracer-writer", daemon=True
+                )
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _write_loop(self) -> None:
+        while True:
+            spans = [self._queue.get()]
+            while True:
+                try:
+                    spans.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(
+                        json.dumps(span, ensure_ascii=False) + "\n" for span in spans
+                    )
+            except Exception as e:
+                logger.warning(f"Failed to write {len(spans)} spans to {self.path}: {e}")
+            finally:
+                for _ in spans:
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """等待已结束的 span 写入文件。"""
+        if self._writer is not None:
+            self._queue.join()
+
+
+_tracer = Tracer(path=os.getenv("TRACE_FILE"))
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def configure_tracing(path: Optional[str]) -> Tracer:
+    global _tracer
+    _tracer.flush()
+    _tracer = Tracer(path=path)
+    return _tracer
+
+
+def span(name: str, **attributes: Any):
+    return get_tracer().span(name, **attributes)
+
+
+def iter_span(name: str, iterator: Iterator[T], **attributes: Any) -> Iterator[T]:
+    return get_tracer().iter_span(name, iterator, **attributes)
+
+
+def aiter_span(name: str, iterator: AsyncIterator[T], **attributes: Any) -> AsyncIterator[T]:
+    return get_tracer().aiter_span(name, iterator, **attributes)
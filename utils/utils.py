@@ -6,8 +6,9 @@ import requests
 from typing import Dict, List, Optional, Any
 from pandas import DataFrame
 from os import getenv
-from openai import OpenAI
 from neo4j import Driver
+from utils.gateway import get_gateway
+from utils.tokens import estimate_tokens
 
 
 CATEGORY_COLS = ["接口一级分类", "接口开发单位", "开发负责人", "联系方式"]
@@ -104,27 +105,26 @@ def ask_llm(
     temperature: float = 0.9,
 ):
     api_key = getenv(api_key_name) if api_key_name else None
-    client = OpenAI(api_key=api_key, base_url=base_url)
-    response = (
-        client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            top_p=top_p,
-            temperature=temperature,
-        )
-        .choices[0]
-        .message.content
+    return get_gateway().chat(
+        base_url=base_url,
+        api_key=api_key,
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        top_p=top_p,
+        temperature=temperature,
     )
-    return response
 
 
 def openai_embedding(embedding_base_url: str, model: str, text: str):
-    client = OpenAI(base_url=embedding_base_url, api_key="fake_key")
-    embedding = client.embeddings.create(input=text, model=model).data[0].embedding
-    return embedding
+    return get_gateway().embed(base_url=embedding_base_url, model=model, texts=[text])[0]
+
+
+def openai_embeddings(embedding_base_url: str, model: str, texts: List[str]):
+    # 一次 embeddings.create 请求多条文本，返回顺序与 texts 一致
+    return get_gateway().embed(base_url=embedding_base_url, model=model, texts=texts)
 
 
 def get_embedding_dimension(
@@ -203,6 +203,23 @@ def set_property(
         return result["new_value"] if result else None
 
 
+def get_database_version(driver: Driver, database: str) -> Optional[int]:
+    """
+    返回数据库最后提交的事务号，数据库有任何写入后该值都会变化。
+    不支持该查询的 Neo4j 版本返回 None。
+    """
+    try:
+        with driver.session(database="system") as session:
+            records = session.run(
+                "SHOW DATABASE $database YIELD lastCommittedTxId",
+                database=database,
+            ).data()
+    except Exception:
+        return None
+    tx_ids = [r["lastCommittedTxId"] for r in records if r["lastCommittedTxId"] is not None]
+    return max(tx_ids) if tx_ids else None
+
+
 def flatten(lst):
     for x in lst:
         if isinstance(x, list):
@@ -0,0 +1,189 @@
+import os
+import json
+import threading
+import numpy as np
+
+from typing import Any, Dict, List, Optional, Tuple
+from haystack import Document
+from neo4j import Driver
+from loguru import logger
+from utils.tracing import span
+from utils.embedding_storage import EmbeddingStorage, vector_index_alias
+
+
+DEFAULT_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "./.cache/vector_index")
+
+
+def _index_paths(directory: str, name: str):
+    return (
+        os.path.join(directory, f"{name}.npy"),
+        os.path.join(directory, f"{name}.json"),
+    )
+
+
+def vector_index_exists(name: str, directory: str = DEFAULT_INDEX_DIR) -> bool:
+    return all(os.path.exists(path) for path in _index_paths(directory, name))
+
+
+def remove_vector_index(name: str, directory: str = DEFAULT_INDEX_DIR) -> None:
+    for path in _index_paths(directory, name):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def export_vector_index(
+    driver: Driver,
+    database: str,
+    label: str,
+    directory: str = DEFAULT_INDEX_DIR,
+    embedding_property: str = "embedding",
+    storage: Optional[EmbeddingStorage] = None,
+    name: Optional[str] = None,
+) -> int:
+    """
+    把某个 label 节点的向量导出为矩阵 ({name}.npy，精度和维度由 storage 决定) 和 id/属性 sidecar ({name}.json)，
+    name 默认为 label。sidecar 最后写入，在线的 NumpyVectorIndex 以它的修改时间判断是否需要重新加载。
+    """
+    os.makedirs(directory, exist_ok=True)
+    ids, metas, vectors = [], [], []
+    with driver.session(database=database) as session:
+        result = session.run(
+            f"""
+            MATCH (n:`{label}`)
+            WHERE n.`{embedding_property}` IS NOT NULL
+            RETURN n.id AS id, properties(n) AS meta, n.`{embedding_property}` AS embedding
+            """
+        )
+        for record in result:
+            # 去掉向量、指纹以及其他版本的向量属性
+            meta = {
+                k: v
+                for k, v in record["meta"].items()
+                if k != "id" and not k.startswith("embedding")
+            }
+            ids.append(record["id"])
+            metas.append(meta)
+            vectors.append(np.asarray(record["embedding"], dtype=np.float32))
+
+    matrix_path, sidecar_path = _index_paths(directory, name or label)
+    if vectors:
+        matrix = (storage or EmbeddingStorage()).encode(np.stack(vectors))
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+    with open(f"{matrix_path}.tmp", "wb") as f:
+        np.save(f, np.ascontiguousarray(matrix))
+    os.replace(f"{matrix_path}.tmp", matrix_path)
+    with open(f"{sidecar_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"ids": ids, "meta": metas}, f, ensure_ascii=False, default=str)
+    os.replace(f"{sidecar_path}.tmp", sidecar_path)
+
+    logger.info(f"Exported {len(ids)} '{label}' vectors to {directory}")
+    return len(ids)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    # float16 / int8 存储的矩阵在内存中还原为 float32 计算
+    matrix = EmbeddingStorage.decode(matrix)
+    if len(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.maximum(norms, 1e-12)
+    return np.ascontiguousarray(matrix)
+
+
+def cosine_top_k(
+    matrix: np.ndarray, query_embedding: List[float], top_k: int
+) -> List[Tuple[int, float]]:
+    """
+    matrix 的行已归一化。返回 (行号, 分数)，分数与 Neo4j cosine 向量索引一致: (1 + cos) / 2。
+    """
+    if not len(matrix) or top_k <= 0:
+        return []
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    scores = matrix @ query
+
+    top_k = min(top_k, len(matrix))
+    top = np.argpartition(-scores, top_k - 1)[:top_k]
+    top = top[np.argsort(-scores[top])]
+    return [(int(i), float((1 + scores[i]) / 2)) for i in top]
+
+
+class NumpyVectorIndex:
+    """
+    进程内精确向量检索：cosine 相似度 = 归一化矩阵 x 查询向量，argpartition 取 top-k。
+    """
+
+    def __init__(
+        self, label: str, directory: str = DEFAULT_INDEX_DIR, name: Optional[str] = None
+    ) -> None:
+        self.label = label
+        self.matrix_path, self.sidecar_path = _index_paths(directory, name or label)
+        # (matrix, ids, metas) 整体替换，检索时读到的总是同一版本
+        self._data: Tuple[np.ndarray, List[str], List[Dict[str, Any]]] = (
+            np.empty((0, 0), dtype=np.float32),
+            [],
+            [],
+        )
+        self._loaded_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data[1])
+
+    def _maybe_reload(self) -> None:
+        try:
+            mtime = os.stat(self.sidecar_path).st_mtime
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"Vector index for '{self.label}' not found, run embed/embed_service-list.py first"
+            )
+        if mtime == self._loaded_mtime:
+            return
+
+        with self._lock:
+            if mtime == self._loaded_mtime:
+                return
+            matrix = np.load(self.matrix_path)
+            with open(self.sidecar_path, "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+            if len(matrix) != len(sidecar["ids"]):
+                # 导出进行到一半，等 sidecar 写完后再加载
+                return
+            self._data = (normalize_rows(matrix), sidecar["ids"], sidecar["meta"])
+            self._loaded_mtime = mtime
+            logger.debug(f"Loaded {len(sidecar['ids'])} '{self.label}' vectors")
+
+    def search(self, query_embedding: List[float], top_k: int) -> List[Document]:
+        self._maybe_reload()
+        matrix, ids, metas = self._data
+        if not ids or top_k <= 0:
+            return []
+
+        if matrix.shape[1] != len(query_embedding):
+            raise ValueError(
+                f"Query has {len(query_embedding)} dims but '{self.label}' vectors "
+                f"in {self.matrix_path} have {matrix.shape[1]}"
+            )
+        with span("vector_index.search", label=self.label, rows=len(ids), top_k=top_k):
+            top = cosine_top_k(matrix, query_embedding, top_k)
+        return [Document(id=ids[i], meta=dict(metas[i]), score=score) for i, score in top]
+
+
+_indexes: Dict[Tuple[str, str], NumpyVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(label: str, directory: str = DEFAULT_INDEX_DIR) -> NumpyVectorIndex:
+    """按 manifest 中 label 当前的文件名返回向量索引，嵌入脚本切换版本后随之切换。"""
+    name = vector_index_alias(label)["local_index"]
+    key = (directory, name)
+    with _indexes_lock:
+        if key not in _indexes:
+            # 切换版本后释放同一 label 旧文件的矩阵
+            for old_key, index in list(_indexes.items()):
+                if index.label == label and old_key[0] == directory:
+                    del _indexes[old_key]
+            _indexes[key] = NumpyVectorIndex(label=label, directory=directory, name=name)
+        return _indexes[key]